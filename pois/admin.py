@@ -1,9 +1,229 @@
+from typing import Optional
 from django.contrib import admin
-from .models import Poi
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.expressions import RawSQL
+from django.utils.functional import cached_property
+
+from . import search
+from .models import Category, CategoryStats, ImportGeneration, ImportJob, Poi, PoiGroup
+from .writers import apply_group_deltas, group_deltas
+
+# Query parameter of the keyset "next page" links: show PoIs with a lower id than this.
+AFTER_VAR = "after"
+
+
+class CategoryFilter(admin.SimpleListFilter):
+    """Category sidebar listing CategoryStats rows instead of a DISTINCT over the table."""
+    title = "category"
+    parameter_name = "category"
+
+    def lookups(self, request, model_admin):
+        lookups = []
+        for stats in CategoryStats.objects.order_by("category"):
+            avg = f", avg {stats.avg_rating}" if stats.avg_rating is not None else ""
+            lookups.append((stats.category, f"{stats.category} ({stats.poi_count}{avg})"))
+        return lookups
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(category=self.value())
+
+
+class PoiCategoryFilter(CategoryFilter):
+    """Same sidebar; PoIs are matched on the integer category id."""
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(category__in=Category.objects.filter(name=self.value()).values("pk"))
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts a precomputed count instead of running COUNT(*)."""
+
+    def __init__(self, *args, estimated_count: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.estimated_count = estimated_count
+
+    @cached_property
+    def count(self) -> int:
+        if self.estimated_count is not None:
+            return self.estimated_count
+        return super().count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Adds ?after=<id> pages: rows below that id in the default (-pk) order, so moving
+    forward is an index range scan rather than a deep OFFSET.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(AFTER_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting or filtering starts over from the first page.
+        return super().get_query_string(new_params, [*(remove or []), AFTER_VAR])
+
+    @property
+    def keyset(self) -> bool:
+        return ORDER_VAR not in self.params and not self.show_all
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        self.after = None
+        if self.keyset and request.GET.get(AFTER_VAR, "").isdigit():
+            self.after = int(request.GET[AFTER_VAR])
+            queryset = queryset.filter(pk__lt=self.after)
+        return queryset
+
+    def get_results(self, request):
+        if self.after is not None:
+            self.page_num = 1
+        super().get_results(request)
+        self.first_page_url = self.get_query_string() if self.after is not None else None
+        self.next_page_url = None
+        if self.keyset and self.multi_page:
+            page = list(self.result_list)
+            if len(page) >= self.list_per_page:
+                self.next_page_url = self.get_query_string({AFTER_VAR: page[-1].pk})
+
+
+class EstimatedCountAdmin(admin.ModelAdmin):
+    """
+    Large-table mode: no unfiltered COUNT(*) next to the result count, no facet counts,
+    and the paginator count comes from the CategoryStats column `estimated_count_field`
+    where possible.
+    """
+    estimated_count_field = "poi_count"
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    paginator = EstimatedCountPaginator
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, orphans, allow_empty_first_page, estimated_count=self.estimated_count(request),
+        )
+
+    def estimated_count(self, request) -> Optional[int]:
+        """
+        Row count from CategoryStats for unfiltered or category-only listings (as of
+        the last import); None, i.e. a real COUNT, for searches and missing stats.
+        """
+        params = {k: v for k, v in request.GET.items() if k not in (PAGE_VAR, ORDER_VAR, AFTER_VAR, "e")}
+        if any(k != CategoryFilter.parameter_name and not k.startswith("_") for k in params):
+            return None
+        stats = CategoryStats.objects.all()
+        if CategoryFilter.parameter_name in params:
+            stats = stats.filter(category=params[CategoryFilter.parameter_name])
+        return stats.aggregate(total=Sum(self.estimated_count_field))["total"]
+
 
 @admin.register(Poi)
-class PoiAdmin(admin.ModelAdmin):
+class PoiAdmin(EstimatedCountAdmin):
     list_display = ("id", "name", "external_id", "category", "avg_rating")
-    list_filter = ("category",)
+    list_select_related = ("category",)
+    list_filter = (PoiCategoryFilter,)
     search_fields = ("id", "external_id", "name")
+    autocomplete_fields = ("category",)
     readonly_fields = ("created_at", "updated_at")
+
+    # Edits keep PoiGroup in step like the import writers do: the stored values leave
+    # their group and the saved ones join theirs, in the same transaction as the write.
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            deltas = group_deltas(Poi.objects.filter(pk=obj.pk), -1) if change else {}
+            super().save_model(request, obj, form, change)
+            apply_group_deltas(group_deltas(Poi.objects.filter(pk=obj.pk), 1, deltas))
+            ImportGeneration.bump()
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            deltas = group_deltas(Poi.objects.filter(pk=obj.pk), -1)
+            super().delete_model(request, obj)
+            apply_group_deltas(deltas)
+            ImportGeneration.bump()
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            deltas = group_deltas(queryset, -1)
+            super().delete_queryset(request, queryset)
+            apply_group_deltas(deltas)
+            ImportGeneration.bump()
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Exact id / external_id matches plus full-text matches on name and category,
+        instead of LIKE '%term%' scans. Falls back to search_fields without the index.
+        """
+        term = search_term.strip()
+        if not term or not search.has_fts():
+            return super().get_search_results(request, queryset, search_term)
+
+        matches = Q(external_id=term)
+        if term.isdigit():
+            matches |= Q(pk=int(term))
+        query = search.fts_query(term)
+        if query is not None:
+            matches |= Q(pk__in=RawSQL(search.matching_ids_sql(), [query]))
+        return queryset.filter(matches), False
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ("id", "name")
+    search_fields = ("name",)
+
+
+@admin.register(PoiGroup)
+class PoiGroupAdmin(EstimatedCountAdmin):
+    estimated_count_field = "group_count"
+    list_display = ("name", "category", "poi_count", "rating_count", "avg_rating")
+    list_filter = (CategoryFilter,)
+    search_fields = ("name",)
+    readonly_fields = ("name", "category", "poi_count", "rating_sum", "rating_count")
+
+
+@admin.register(CategoryStats)
+class CategoryStatsAdmin(admin.ModelAdmin):
+    list_display = ("category", "poi_count", "group_count", "rating_count", "avg_rating", "updated_at")
+    search_fields = ("category",)
+    readonly_fields = ("category", "poi_count", "group_count", "rating_sum", "rating_count", "updated_at")
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """Uploading a file only queues a job; run_import_workers imports it."""
+    list_display = ("id", "file", "status", "records", "rejected", "rows_per_sec", "created_at", "finished_at")
+    list_filter = ("status",)
+    actions = ["requeue"]
+    progress_fields = (
+        "status", "records", "inserted", "updated", "unchanged", "rejected", "rows_per_sec", "error",
+        "created_at", "started_at", "finished_at",
+    )
+
+    def get_fields(self, request, obj=None):
+        return ("file", "format") if obj is None else ("file", "format", *self.progress_fields)
+
+    def get_readonly_fields(self, request, obj=None):
+        return () if obj is None else self.get_fields(request, obj)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            self.message_user(request, "Queued; run_import_workers will import the file.")
+
+    @admin.action(description="Queue selected jobs again")
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status=ImportJob.RUNNING).update(
+            status=ImportJob.QUEUED, records=0, inserted=0, updated=0, unchanged=0, rejected=0,
+            rows_per_sec=None, error="", started_at=None, finished_at=None,
+        )
+        self.message_user(request, f"Queued {count} job(s).")
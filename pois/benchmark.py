@@ -0,0 +1,109 @@
+from typing import Any, Dict, List
+
+from django.db import transaction
+
+from pois.metrics import rss_bytes
+from pois.pipeline import STAGES, Format, Normalizer, Pipeline
+from pois.utils import normalize_batch
+
+# Sample RSS every this many records while reading.
+READ_SAMPLE_EVERY = 1000
+
+
+class StageProbe:
+    """Wraps a pipeline's reader, normalizer and writer to record the peak RSS seen in each stage."""
+
+    def __init__(self):
+        self.peak_rss = dict.fromkeys(STAGES, 0)
+
+    def sample(self, stage: str) -> None:
+        # 0 where RSS can't be measured; find_regressions() skips it then.
+        self.peak_rss[stage] = max(self.peak_rss[stage], rss_bytes() or 0)
+
+    def reader(self, reader):
+        def read(f):
+            for i, record in enumerate(reader(f)):
+                if i % READ_SAMPLE_EVERY == 0:
+                    self.sample("read")
+                yield record
+        return read
+
+    def normalizer(self, normalizer):
+        def normalize(records, file_type):
+            rows = normalizer(records, file_type)
+            self.sample("normalize")
+            return rows
+        return normalize
+
+    def writer(self, writer):
+        probe = self
+
+        class Writer:
+            def write(self, batch):
+                stats = writer.write(batch)
+                probe.sample("write")
+                return stats
+        return Writer()
+
+
+class _Rollback(Exception):
+    pass
+
+
+def run_benchmark(
+    path: str, fmt: Format, writer: Any, rows: int, normalizer: Normalizer = normalize_batch,
+) -> Dict[str, Any]:
+    """
+    Import `path` and report seconds, rows/sec and peak RSS (MiB) per stage. The
+    writes are rolled back, so the database is left as it was.
+    """
+    probe = StageProbe()
+    pipeline = Pipeline(
+        probe.reader(fmt.reader), fmt.file_type,
+        normalizer=probe.normalizer(normalizer),
+        writer=probe.writer(writer),
+    )
+    try:
+        with transaction.atomic():
+            stats = pipeline.run(path, show_progress=False)
+            raise _Rollback
+    except _Rollback:
+        pass
+
+    result: Dict[str, Any] = {"rows": rows, "processed": stats.processed, "rejected": stats.rejected, "stages": {}}
+    for stage in STAGES:
+        seconds = stats.timings[stage]
+        result["stages"][stage] = {
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+            "peak_rss_mib": round(probe.peak_rss[stage] / 2 ** 20, 1),
+        }
+    total = sum(stats.timings.values())
+    result["rows_per_sec"] = round(rows / total, 1) if total else None
+    result["peak_rss_mib"] = max(stage["peak_rss_mib"] for stage in result["stages"].values())
+    return result
+
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Compare two benchmark result documents format by format and stage by stage.
+    Throughput more than `threshold` (a fraction) below the baseline, or peak RSS
+    more than `threshold` above it, counts as a regression.
+    """
+    regressions = []
+    for name, current in results["formats"].items():
+        base = baseline.get("formats", {}).get(name)
+        if base is None:
+            continue
+        pairs = [(name, current, base)] + [
+            (f"{name}/{stage}", current["stages"][stage], base["stages"][stage])
+            for stage in STAGES if stage in base.get("stages", {})
+        ]
+        for label, now, then in pairs:
+            if now.get("rows_per_sec") and then.get("rows_per_sec"):
+                if now["rows_per_sec"] < then["rows_per_sec"] * (1 - threshold):
+                    regressions.append(f"{label}: {now['rows_per_sec']} rows/s vs {then['rows_per_sec']} baseline")
+            if now.get("peak_rss_mib") and then.get("peak_rss_mib"):
+                if now["peak_rss_mib"] > then["peak_rss_mib"] * (1 + threshold):
+                    regressions.append(f"{label}: peak RSS {now['peak_rss_mib']} MiB vs {then['peak_rss_mib']} baseline")
+    return regressions
@@ -0,0 +1,26 @@
+from typing import Dict, Iterable
+
+from django.db import transaction
+
+from pois.models import Category
+
+
+class CategoryCache:
+    """
+    Category name -> id for a loader. Names the cache hasn't seen are created (or
+    looked up) with two queries per batch; once every name is known a batch is
+    resolved without touching the database. New ids are only cached after their
+    transaction commits, so a rolled-back batch can't leave dangling ids behind.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def resolve(self, names: Iterable[str]) -> Dict[str, int]:
+        missing = set(names).difference(self.ids)
+        if not missing:
+            return self.ids
+        Category.objects.bulk_create([Category(name=name) for name in missing], ignore_conflicts=True)
+        found = dict(Category.objects.filter(name__in=missing).values_list("name", "pk"))
+        transaction.on_commit(lambda: self.ids.update(found))
+        return {**self.ids, **found}
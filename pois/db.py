@@ -0,0 +1,114 @@
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from django.db import connection as default_connection
+from django.db.backends.signals import connection_created
+
+from pois.models import BulkLoadUndo
+
+# Applied for the duration of a --bulk-load import, then restored.
+BULK_LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    # Safe with WAL: a power loss can drop the last commits but not corrupt the file.
+    "synchronous": "NORMAL",
+    # Negative means KiB, i.e. a 512 MiB page cache.
+    "cache_size": "-524288",
+    "temp_store": "MEMORY",
+}
+
+# Batches per transaction in bulk-load mode (STREAM_BATCH_SIZE rows each).
+BULK_LOAD_TRANSACTION_BATCHES = 20
+
+
+def _pragma(cursor, name: str, value: Optional[str] = None):
+    if value is None:
+        cursor.execute(f"PRAGMA {name}")
+    else:
+        cursor.execute(f"PRAGMA {name} = {value}")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def secondary_indexes(cursor, table: str) -> List[tuple]:
+    """(name, sql) of the non-unique indexes created on `table` with CREATE INDEX."""
+    cursor.execute(f'PRAGMA index_list("{table}")')
+    names = [row[1] for row in cursor.fetchall() if not row[2] and row[3] == "c"]
+    if not names:
+        return []
+    placeholders = ", ".join(["%s"] * len(names))
+    cursor.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name IN ({placeholders})", names,
+    )
+    return cursor.fetchall()
+
+
+def recover_bulk_load(connection=None) -> int:
+    """
+    Run the pending BulkLoadUndo statements: what an interrupted sqlite_bulk_load()
+    left behind (or what a finishing one is about to undo). Returns how many ran.
+    """
+    connection = connection or default_connection
+    if connection.vendor != "sqlite":
+        return 0
+    pending = list(BulkLoadUndo.objects.using(connection.alias).order_by("pk"))
+    if not pending:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        existing = {row[0] for row in cursor.fetchall()}
+        ran = 0
+        for undo in pending:
+            if undo.index_name in existing:
+                continue
+            cursor.execute(undo.sql)
+            ran += 1
+    BulkLoadUndo.objects.using(connection.alias).filter(pk__in=[undo.pk for undo in pending]).delete()
+    return ran
+
+
+@contextmanager
+def sqlite_bulk_load(tables: List[str], connection=None) -> Iterator[None]:
+    """
+    Tune SQLite for a large load: apply BULK_LOAD_PRAGMAS and drop the non-unique
+    indexes of `tables`, then rebuild the indexes and restore the previous settings
+    on exit. Unique indexes stay in place since upserts rely on them.
+    The dropped indexes and the journal mode (the settings that outlive the
+    process) are recorded as BulkLoadUndo rows first, so if the process is killed
+    the next recover_bulk_load() call puts them back.
+    No-op on other database backends.
+    """
+    connection = connection or default_connection
+    if connection.vendor != "sqlite":
+        yield
+        return
+    if connection.in_atomic_block:
+        raise RuntimeError("sqlite_bulk_load() must be entered outside a transaction.")
+
+    def apply_pragmas(sender, connection, **kwargs) -> None:
+        with connection.cursor() as cursor:
+            for name, value in BULK_LOAD_PRAGMAS.items():
+                _pragma(cursor, name, value)
+
+    recover_bulk_load(connection)
+    with connection.cursor() as cursor:
+        previous = {name: _pragma(cursor, name) for name in BULK_LOAD_PRAGMAS}
+        dropped = [idx for table in tables for idx in secondary_indexes(cursor, table)]
+        undo = [BulkLoadUndo(index_name=name, sql=sql) for name, sql in dropped]
+        undo += [BulkLoadUndo(sql=f'ANALYZE "{table}"') for table in tables if dropped]
+        undo.append(BulkLoadUndo(sql=f"PRAGMA journal_mode = {previous['journal_mode']}"))
+        # Committed before anything is dropped (we're outside a transaction).
+        BulkLoadUndo.objects.using(connection.alias).bulk_create(undo)
+        for name, _ in dropped:
+            cursor.execute(f'DROP INDEX "{name}"')
+    apply_pragmas(None, connection)
+    # Most pragmas are per connection, so reapply them if the connection is reopened
+    # (e.g. after run_parallel closes it before forking).
+    connection_created.connect(apply_pragmas, dispatch_uid="pois-bulk-load")
+    try:
+        yield
+    finally:
+        connection_created.disconnect(dispatch_uid="pois-bulk-load")
+        recover_bulk_load(connection)
+        with connection.cursor() as cursor:
+            for name, value in previous.items():
+                _pragma(cursor, name, value)
@@ -0,0 +1,128 @@
+import math
+import os
+import pickle
+import tempfile
+from operator import itemgetter
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pois.pipeline import ImportStats
+from pois.utils import STREAM_BATCH_SIZE, PoiBatch
+
+# Which copy of a repeated external_id is kept: the last one read, or the first one
+# (i.e. the files are listed in priority order, highest first).
+DEDUPE_RULES = ("last", "first")
+
+# Aim for partitions of about this much input, so each one fits in memory on its own.
+PARTITION_INPUT_BYTES = 64 * 1024 * 1024
+# Rough size ratio of decompressed to compressed input.
+COMPRESSED_EXPANSION = 5
+MAX_PARTITIONS = 512
+# Used when the input size is unknown (stdin).
+DEFAULT_PARTITIONS = 64
+# Rows buffered per partition before they are appended to its file.
+SPILL_BUFFER_ROWS = 2000
+
+# (external_id, name, category, latitude, longitude, avg_rating), as PoiBatch.rows() yields them.
+Row = Tuple[Any, ...]
+
+
+def partition_count(inputs: Iterable[Tuple[Optional[int], bool]]) -> int:
+    """Partitions for inputs given as (size on disk or None if unknown, compressed) pairs."""
+    total = 0
+    for size, compressed in inputs:
+        if size is None:
+            return DEFAULT_PARTITIONS
+        total += size * (COMPRESSED_EXPANSION if compressed else 1)
+    return max(1, min(MAX_PARTITIONS, math.ceil(total / PARTITION_INPUT_BYTES)))
+
+
+class PartitionSpill:
+    """
+    Writer that resolves repeated external_ids across batches and files with bounded
+    memory. write() appends each normalized row to one of `partitions` temporary
+    files picked by a hash of its external_id, so all copies of a PoI share a
+    partition. batches() then loads one partition at a time, keeps one row per
+    external_id by `rule` and yields the survivors as PoiBatches for the real
+    writer, so each PoI is written once per run. Rows are read back in the order
+    they were spilled, which is what "last" and "first" refer to.
+    """
+
+    def __init__(self, partitions: int, rule: str = "last", directory: Optional[str] = None):
+        if rule not in DEDUPE_RULES:
+            raise ValueError(f"Unknown dedupe rule: {rule}")
+        self.rule = rule
+        self.tmp = tempfile.TemporaryDirectory(prefix="pois-dedupe-", dir=directory)
+        self.buffers: List[List[Row]] = [[] for _ in range(partitions)]
+        self.files: Dict[int, BinaryIO] = {}
+        self.spilled = 0
+        self.duplicates = 0
+
+    def __enter__(self) -> "PartitionSpill":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for f in self.files.values():
+            f.close()
+        self.files.clear()
+        self.tmp.cleanup()
+
+    def _path(self, partition: int) -> str:
+        return os.path.join(self.tmp.name, f"{partition}.pickle")
+
+    def _flush(self, partition: int) -> None:
+        f = self.files.get(partition)
+        if f is None:
+            f = self.files[partition] = open(self._path(partition), "ab")
+        pickle.dump(self.buffers[partition], f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.buffers[partition] = []
+
+    def write(self, batch: PoiBatch) -> ImportStats:
+        buffers, n = self.buffers, len(self.buffers)
+        for row in batch.rows():
+            # hash() of a str is stable within this process, which is all the partitions need.
+            partition = hash(row[0]) % n
+            buffer = buffers[partition]
+            buffer.append(row)
+            if len(buffer) >= SPILL_BUFFER_ROWS:
+                self._flush(partition)
+        self.spilled += len(batch)
+        # Nothing is written to the database until batches() is consumed.
+        return ImportStats(staged=len(batch))
+
+    def _partition_rows(self, partition: int) -> Iterator[Row]:
+        f = self.files.pop(partition, None)
+        if f is not None:
+            f.close()
+            with open(self._path(partition), "rb") as f:
+                while True:
+                    try:
+                        yield from pickle.load(f)
+                    except EOFError:
+                        break
+            os.remove(self._path(partition))
+        yield from self.buffers[partition]
+        self.buffers[partition] = []
+
+    def batches(self, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[PoiBatch]:
+        """The surviving rows in PoiBatches of up to batch_size, partition by partition."""
+        for partition in range(len(self.buffers)):
+            survivors: Dict[str, Row] = {}
+            count = 0
+            if self.rule == "last":
+                for row in self._partition_rows(partition):
+                    survivors[row[0]] = row
+                    count += 1
+            else:
+                for row in self._partition_rows(partition):
+                    survivors.setdefault(row[0], row)
+                    count += 1
+            self.duplicates += count - len(survivors)
+
+            # Sorted, so the writer's upserts walk the external_id index in order.
+            rows = sorted(survivors.values(), key=itemgetter(0))
+            del survivors
+            for start in range(0, len(rows), batch_size):
+                yield PoiBatch(*map(list, zip(*rows[start:start + batch_size])))
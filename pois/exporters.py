@@ -0,0 +1,77 @@
+import csv
+import json
+from typing import Any, Callable, Dict, Iterable, Optional, TextIO, Tuple
+
+from pois.utils import FIELD_MAPS
+
+# (external_id, name, category, latitude, longitude, avg_rating), as stored on Poi.
+ExportRow = Tuple[Any, ...]
+EXPORT_FIELDS = ("external_id", "name", "category__name", "latitude", "longitude", "avg_rating")
+
+# Rows are written with the field names the parsers read. The stored average goes
+# out as a single rating, which the importer averages back to the same value.
+
+
+def _json_record(row: ExportRow) -> Dict[str, Any]:
+    ext_id, name, category, lat, lon, avg = row
+    id_key, name_key, category_key, (coords_key, lat_key), (_, lon_key), ratings_key = FIELD_MAPS["json"]
+    return {
+        id_key: ext_id,
+        name_key: name,
+        category_key: category,
+        coords_key: {lat_key: lat, lon_key: lon},
+        ratings_key: [avg] if avg is not None else [],
+    }
+
+
+def _csv_value(value: Optional[float]) -> str:
+    return "" if value is None else repr(value)
+
+
+def write_csv(out: TextIO, rows: Iterable[ExportRow]) -> int:
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(FIELD_MAPS["csv"])
+    count = 0
+    for ext_id, name, category, lat, lon, avg in rows:
+        ratings = "{" + repr(avg) + "}" if avg is not None else ""
+        writer.writerow((ext_id, name, category, _csv_value(lat), _csv_value(lon), ratings))
+        count += 1
+    return count
+
+
+def write_json(out: TextIO, rows: Iterable[ExportRow]) -> int:
+    """{"items": [...]} like the sample files, written one record at a time."""
+    count = 0
+    out.write('{"items": [')
+    for row in rows:
+        out.write(",\n" if count else "\n")
+        out.write(json.dumps(_json_record(row), ensure_ascii=False))
+        count += 1
+    out.write("\n]}\n")
+    return count
+
+
+def write_ndjson(out: TextIO, rows: Iterable[ExportRow]) -> int:
+    count = 0
+    for row in rows:
+        out.write(json.dumps(_json_record(row), ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+
+Exporter = Callable[[TextIO, Iterable[ExportRow]], int]
+
+# Format name -> (exporter, file suffixes that imply it)
+EXPORTERS: Dict[str, Tuple[Exporter, Tuple[str, ...]]] = {
+    "csv": (write_csv, (".csv",)),
+    "json": (write_json, (".json",)),
+    "ndjson": (write_ndjson, (".ndjson", ".jsonl")),
+}
+
+
+def format_for_suffix(suffix: str) -> Optional[str]:
+    for name, (_, suffixes) in EXPORTERS.items():
+        if suffix.lower() in suffixes:
+            return name
+    return None
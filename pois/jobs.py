@@ -0,0 +1,94 @@
+import os
+from typing import Any, Dict, List, Optional
+
+from django.utils import timezone
+
+from pois.models import ImportJob
+from pois.parallel import run_parallel
+from pois.pipeline import ImportStats, Pipeline, format_named, get_format
+from pois.utils import normalize_batch
+
+
+class JobProgress:
+    """
+    Receives the batch()/file() events of pois.metrics.ImportMetrics and writes the
+    progress of each job (rows so far, rejected rows, rows/sec) to its ImportJob row.
+    """
+
+    def __init__(self, jobs: List[ImportJob]):
+        self.jobs = {job.file.path: job for job in jobs}
+
+    def batch(self, path: str, number: int, rows: int, rejected: int, timings: Dict[str, float]) -> None:
+        job = self.jobs[path]
+        job.records += rows
+        job.rejected += rejected
+        job.rows_per_sec = _rate(job.records, job.started_at, timezone.now())
+        ImportJob.objects.filter(pk=job.pk).update(
+            records=job.records, rejected=job.rejected, rows_per_sec=job.rows_per_sec,
+        )
+
+    def file(self, path: str, stats: ImportStats) -> None:
+        pass
+
+
+def _rate(rows: int, started_at, now) -> Optional[float]:
+    seconds = (now - started_at).total_seconds() if started_at else 0
+    return round(rows / seconds, 1) if seconds > 0 else None
+
+
+def finish(job: ImportJob, result: Any) -> None:
+    """Record a job's outcome: ImportStats, or an error message."""
+    job.finished_at = timezone.now()
+    if isinstance(result, str):
+        job.status, job.error = ImportJob.FAILED, result
+    else:
+        job.status, job.error = ImportJob.DONE, ""
+        job.records, job.rejected = result.processed, result.rejected
+        job.inserted, job.updated, job.unchanged = result.inserted, result.updated, result.unchanged
+        job.rows_per_sec = _rate(job.records, job.started_at, job.finished_at)
+    job.save(update_fields=[
+        "status", "error", "records", "rejected", "inserted", "updated", "unchanged", "rows_per_sec", "finished_at",
+    ])
+
+
+def run_jobs(jobs: List[ImportJob], workers: int, writer: Any = None, normalizer=normalize_batch) -> ImportStats:
+    """
+    Import claimed jobs and record their outcome. With workers > 1 the files are
+    parsed by a pool of processes (see pois.parallel) while this process writes.
+    Returns the combined stats of the jobs that succeeded.
+    """
+    results: Dict[str, Any] = {}
+    sources = []
+    for job in jobs:
+        path = job.file.path
+        fmt = format_named(job.format) if job.format else get_format(job.file.name)
+        if fmt is None:
+            results[path] = f"Unsupported file type: {job.file.name}"
+        elif not os.path.isfile(path):
+            results[path] = f"File not found: {path}"
+        else:
+            sources.append((path, fmt))
+
+    progress = JobProgress(jobs)
+    if workers > 1 and sources:
+        try:
+            results.update(run_parallel(
+                sources, workers, writer=writer, normalizer=normalizer, show_progress=False, metrics=progress,
+            ))
+        except Exception as exc:
+            results.update((path, f"{type(exc).__name__}: {exc}") for path, _ in sources)
+    else:
+        for path, fmt in sources:
+            try:
+                pipeline = Pipeline.from_format(fmt, normalizer=normalizer, writer=writer, metrics=progress)
+                results[path] = pipeline.run(path, show_progress=False)
+            except Exception as exc:
+                results[path] = f"{type(exc).__name__}: {exc}"
+
+    total = ImportStats()
+    for job in jobs:
+        result = results[job.file.path]
+        finish(job, result)
+        if not isinstance(result, str):
+            total.merge(result)
+    return total
@@ -0,0 +1,75 @@
+import json
+import os
+import platform
+import tempfile
+from django.core.management.base import BaseCommand, CommandError
+
+from pois.benchmark import find_regressions, run_benchmark
+from pois.pipeline import format_named
+from pois.synthetic import SYNTHETIC_WRITERS, generate, row_count
+from pois.writers import WRITERS
+
+SUFFIXES = {"csv": ".csv", "json": ".json", "ndjson": ".ndjson", "xml": ".xml"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark imports on deterministic synthetic files: rows/sec and peak RSS per stage "
+        "and per format. Writes are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=row_count, default=10_000, help="Rows per file, e.g. 10k, 1m, 10m.")
+        parser.add_argument("--formats", nargs="+", choices=sorted(SYNTHETIC_WRITERS), default=["csv", "json", "xml"])
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--writer", choices=sorted(WRITERS), default="orm")
+        parser.add_argument(
+            "--data-dir", default=os.path.join(tempfile.gettempdir(), "poi-benchmark"),
+            help="Where generated files are kept; files for the same rows and seed are reused.",
+        )
+        parser.add_argument("--output", help="Save the results as JSON to this file.")
+        parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Fail when rows/sec drops, or peak RSS grows, by more than this fraction (default 0.2).",
+        )
+
+    def handle(self, *args, **options):
+        rows, seed = options["rows"], options["seed"]
+        os.makedirs(options["data_dir"], exist_ok=True)
+        results = {
+            "rows": rows, "seed": seed, "writer": options["writer"],
+            "python": platform.python_version(), "formats": {},
+        }
+        for name in options["formats"]:
+            path = os.path.join(options["data_dir"], f"synthetic-{rows}-{seed}{SUFFIXES[name]}")
+            if not os.path.exists(path):
+                self.stdout.write(f"Generating {path} ...")
+                generate(path + ".tmp", name, rows, seed)
+                os.replace(path + ".tmp", path)
+
+            self.stdout.write(f"Importing {name} ...")
+            result = run_benchmark(path, format_named(name), WRITERS[options["writer"]](), rows)
+            results["formats"][name] = result
+            stages = ", ".join(
+                f"{stage} {s['rows_per_sec'] or 0:,.0f} rows/s ({s['peak_rss_mib']} MiB)"
+                for stage, s in result["stages"].items()
+            )
+            self.stdout.write(f"  {name}: {result['rows_per_sec'] or 0:,.0f} rows/s overall; {stages}")
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results saved to {options['output']}.")
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as f:
+                baseline = json.load(f)
+            if baseline.get("rows") != rows:
+                self.stderr.write(self.style.WARNING(
+                    f"Baseline was measured on {baseline.get('rows')} rows, this run on {rows}."
+                ))
+            regressions = find_regressions(results, baseline, options["threshold"])
+            if regressions:
+                raise CommandError("Regressions beyond the threshold:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
@@ -0,0 +1,100 @@
+import random
+import time
+from typing import Callable, List, Tuple
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from pois.models import Category, Poi
+from pois.spatial import grid_cell
+from pois.writers import _upsert_sql
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare grid-indexed bbox/radius/nearest PoI queries with a full lat/lon scan "
+        "on synthetic rows. The rows are inserted in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic PoIs to insert (default 1M).")
+        parser.add_argument("--queries", type=int, default=20, help="Random query points per benchmark.")
+        parser.add_argument("--km", type=float, default=25.0, help="Radius for the radius query.")
+        parser.add_argument("--k", type=int, default=10, help="Neighbours for the nearest query.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                self.insert_rows(options["rows"], rng)
+                self.run_benchmarks(options, rng)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def insert_rows(self, count: int, rng: random.Random) -> None:
+        self.stdout.write(f"Inserting {count} synthetic PoIs ...")
+        start = time.perf_counter()
+        sql = _upsert_sql()
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        category_id = Category.named("bench").pk
+        with connection.cursor() as cursor:
+            for offset in range(0, count, 10_000):
+                rows = []
+                for i in range(offset, min(count, offset + 10_000)):
+                    lat, lon = rng.uniform(-60.0, 70.0), rng.uniform(-180.0, 180.0)
+                    rows.append((f"bench-{i}", "bench", category_id, lat, lon, None, grid_cell(lat, lon), "", now, now))
+                cursor.executemany(sql, rows)
+        self.stdout.write(f"  {time.perf_counter() - start:.1f}s")
+
+    def run_benchmarks(self, options, rng: random.Random) -> None:
+        points = [(rng.uniform(-50.0, 60.0), rng.uniform(-170.0, 170.0)) for _ in range(options["queries"])]
+        km, k = options["km"], options["k"]
+        box = 1.0
+
+        def bbox(lat, lon):
+            return Poi.objects.within_bbox(lat, lon, lat + box, lon + box).count()
+
+        def bbox_scan(lat, lon):
+            return Poi.objects.filter(
+                latitude__gte=lat, latitude__lte=lat + box, longitude__gte=lon, longitude__lte=lon + box,
+            ).count()
+
+        def radius(lat, lon):
+            return Poi.objects.within_radius(lat, lon, km).count()
+
+        def radius_scan(lat, lon):
+            return Poi.objects.with_distance(lat, lon).filter(distance_km__lte=km).count()
+
+        def nearest(lat, lon):
+            return len(Poi.objects.nearest(lat, lon, k))
+
+        def nearest_scan(lat, lon):
+            return len(Poi.objects.with_distance(lat, lon).order_by("distance_km")[:k])
+
+        benchmarks: List[Tuple[str, Callable, Callable]] = [
+            (f"bbox {box}x{box} deg", bbox, bbox_scan),
+            (f"radius {km} km", radius, radius_scan),
+            (f"nearest k={k}", nearest, nearest_scan),
+        ]
+        for label, indexed, scan in benchmarks:
+            fast, fast_rows = self.time(indexed, points)
+            slow, slow_rows = self.time(scan, points)
+            if fast_rows != slow_rows:
+                self.stderr.write(self.style.ERROR(f"{label}: indexed query returned {fast_rows} rows, scan {slow_rows}"))
+            self.stdout.write(
+                f"{label}: indexed {fast * 1000:.1f} ms/query, full scan {slow * 1000:.1f} ms/query "
+                f"({slow / fast if fast else 0:.0f}x)"
+            )
+
+    def time(self, query: Callable, points) -> Tuple[float, int]:
+        rows = 0
+        start = time.perf_counter()
+        for lat, lon in points:
+            rows += query(lat, lon)
+        return (time.perf_counter() - start) / len(points), rows
@@ -0,0 +1,70 @@
+import gzip
+import io
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, TextIO
+from django.core.management.base import BaseCommand, CommandError
+
+from pois.exporters import EXPORT_FIELDS, EXPORTERS, format_for_suffix
+from pois.models import Poi
+
+EXPORT_CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Export PoIs to CSV, JSON or NDJSON in the layout import_pois reads back."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output", help="File to write, or - for stdout. A .gz suffix (e.g. pois.csv.gz) compresses the output.",
+        )
+        parser.add_argument(
+            "--format", choices=sorted(EXPORTERS),
+            help="Output format. Defaults to the one implied by the file suffix.",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output even without a .gz suffix.")
+        parser.add_argument("--category", help="Only export PoIs of this category.")
+
+    def handle(self, *args, **options):
+        output: str = options["output"]
+        suffixes = [s.lower() for s in Path(output).suffixes] if output != "-" else []
+        compress = options["gzip"] or suffixes[-1:] == [".gz"]
+        if suffixes[-1:] == [".gz"]:
+            suffixes.pop()
+
+        fmt = options["format"] or (format_for_suffix(suffixes[-1]) if suffixes else None)
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        exporter, _ = EXPORTERS[fmt]
+
+        pois = Poi.objects.order_by("id")
+        if options["category"]:
+            pois = pois.filter(category__name=options["category"])
+        # iterator() streams rows in chunks instead of caching the whole queryset.
+        rows = pois.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        with self.open_output(output, compress) as out:
+            count = exporter(out, rows)
+        if output != "-":
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} PoIs to {output} ({fmt}{', gzip' if compress else ''})."))
+
+    @contextmanager
+    def open_output(self, output: str, compress: bool) -> Iterator[TextIO]:
+        if output == "-":
+            raw = sys.stdout.buffer
+            binary = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+        else:
+            binary = gzip.open(output, "wb") if compress else open(output, "wb")
+        out = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+        try:
+            yield out
+        finally:
+            out.flush()
+            if output == "-":
+                # Leave the process's stdout open.
+                out.detach()
+                if compress:
+                    binary.close()
+            else:
+                out.close()
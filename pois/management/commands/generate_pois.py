@@ -0,0 +1,24 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+
+from pois.sources import data_suffix
+from pois.synthetic import SYNTHETIC_WRITERS, generate, row_count
+
+
+class Command(BaseCommand):
+    help = "Write a deterministic synthetic PoI file (CSV, JSON, NDJSON or XML) for testing and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="File to write; the suffix picks the format unless --format is given. "
+                                               "A .gz, .bz2 or .xz suffix compresses it (e.g. pois.csv.gz).")
+        parser.add_argument("--rows", type=row_count, default=10_000, help="Number of rows, e.g. 10k, 1m, 10m.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--format", choices=sorted(SYNTHETIC_WRITERS))
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or data_suffix(options["output"]).lstrip(".")
+        if fmt not in SYNTHETIC_WRITERS:
+            raise CommandError("Cannot tell the format from the file name; pass --format.")
+        generate(options["output"], fmt, options["rows"], options["seed"])
+        size = Path(options["output"]).stat().st_size
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['rows']} rows to {options['output']} ({size:,} bytes)."))
@@ -1,46 +1,289 @@
+import sys
+from contextlib import ExitStack, nullcontext
+from functools import partial
+from itertools import islice
 from pathlib import Path
+from time import perf_counter
 from typing import List
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
-from pois.parsers.csv_parser import load_csv
-from pois.parsers.json_parser import load_json
-from pois.parsers.xml_parser import load_xml
+from pois.db import BULK_LOAD_TRANSACTION_BATCHES, recover_bulk_load, sqlite_bulk_load
+from pois.dedupe import DEDUPE_RULES, PartitionSpill, partition_count
+from pois.manifest import RESUME, SKIP, open_checkpoint
+from pois.metrics import ImportMetrics, profiled
+from pois.parallel import run_parallel
+from pois.models import Poi
+from pois.pipeline import ImportStats, Pipeline, format_named, get_format
+from pois.snapshot import SnapshotWriter
+from pois.sources import STDIN, is_compressed
+from pois.stats import finish_import
+from pois.utils import normalize_batch
+from pois.writers import WRITERS
 
 class Command(BaseCommand):
-    help = "Import PoI data from CSV, JSON, or XML files."
+    help = "Import PoI data from CSV, JSON, NDJSON, or XML files, optionally gzip/bz2/xz compressed."
 
     def add_arguments(self, parser):
-        parser.add_argument("paths", nargs="+", help="One or more file paths to import.")
+        parser.add_argument("paths", nargs="+", help="One or more file paths to import, or - for stdin.")
+        parser.add_argument(
+            "--format", choices=["csv", "json", "ndjson", "xml"],
+            help="Input format, required for stdin. Defaults to the file suffix (a.csv.gz is CSV).",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Parse and normalize files (or byte-range shards of large CSV/NDJSON files) in N processes; "
+                 "a single writer in this process owns the database connection.",
+        )
+        parser.add_argument(
+            "--exact-ratings", action="store_true",
+            help="Average ratings with Decimal arithmetic (slower) instead of the float fast path.",
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Re-import files even if the manifest says they are unchanged since the last run.",
+        )
+        parser.add_argument(
+            "--writer", choices=sorted(WRITERS), default="orm",
+            help="Write through the ORM (default) or with raw executemany() upserts that skip model instances.",
+        )
+        parser.add_argument(
+            "--bulk-load", action="store_true",
+            help="Tune SQLite for a large load (WAL, relaxed sync, big cache), drop non-unique indexes "
+                 "and rebuild them afterwards, and commit many batches per transaction.",
+        )
+        parser.add_argument(
+            "--snapshot", action="store_true",
+            help="Treat the files as the complete set of PoIs: stage them, then insert, update and delete "
+                 "in one transaction so stored PoIs missing from the files are removed. Ignores the manifest.",
+        )
+        parser.add_argument(
+            "--dedupe", action="store_true",
+            help="Keep one record per external_id across all batches and files before writing (see "
+                 "--dedupe-keep). Records are spilled to hash-partitioned temporary files, so inputs larger "
+                 "than memory work. Ignores the manifest.",
+        )
+        parser.add_argument(
+            "--dedupe-keep", choices=DEDUPE_RULES,
+            help="Which --dedupe record to keep: the last one read (default) or the first one, i.e. files "
+                 "listed in priority order.",
+        )
+        parser.add_argument(
+            "--dedupe-partitions", type=int, metavar="N",
+            help="Number of --dedupe spill partitions (default: about one per 64 MB of input).",
+        )
+        parser.add_argument(
+            "--dedupe-dir", metavar="DIR", help="Directory for the --dedupe spill files (default: the system temp dir).",
+        )
+        parser.add_argument(
+            "--metrics-file", metavar="PATH",
+            help="Write per-batch, per-file and per-run metrics as JSON lines to PATH (- for stderr).",
+        )
+        parser.add_argument(
+            "--profile", nargs="?", const="import_pois-profile", metavar="PREFIX",
+            help="Profile the run: writes PREFIX.prof and PREFIX.txt (cProfile) and PREFIX-memory.txt "
+                 "(tracemalloc). PREFIX defaults to import_pois-profile.",
+        )
 
     def handle(self, *args, **options):
         paths: List[str] = options["paths"]
         if not paths:
             raise CommandError("Provide at least one file path.")
 
-        total_created = 0
+        workers: int = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        normalizer = partial(normalize_batch, exact=options["exact_ratings"])
+
+        if STDIN in paths and workers > 1:
+            raise CommandError("Reading from stdin (-) needs --workers 1.")
+        dedupe = options["dedupe"]
+        if dedupe and workers > 1:
+            raise CommandError("--dedupe reads the files in order and needs --workers 1.")
+        if options["dedupe_keep"] and not dedupe:
+            raise CommandError("--dedupe-keep needs --dedupe.")
+        if options["dedupe_partitions"] is not None and options["dedupe_partitions"] < 1:
+            raise CommandError("--dedupe-partitions must be at least 1.")
+        forced = format_named(options["format"]) if options["format"] else None
+
+        sources = []
         for p in paths:
+            if p == STDIN:
+                if forced is None:
+                    raise CommandError("Pass --format to read from stdin.")
+                # Stdin can't be fingerprinted, so it bypasses the manifest.
+                sources.append((STDIN, forced, None))
+                continue
+
             fp = Path(p)
             if not fp.exists() or not fp.is_file():
                 self.stderr.write(self.style.ERROR(f"File not found: {fp}"))
                 continue
 
-            suffix = fp.suffix.lower()
-            self.stdout.write(self.style.NOTICE(f"Importing {fp} ..."))
-            try:
-                if suffix == ".csv":
-                    created = load_csv(str(fp), show_progress=True)
-                elif suffix == ".json":
-                    created = load_json(str(fp), show_progress=True)
-                elif suffix == ".xml":
-                    created = load_xml(str(fp), show_progress=True)
-                else:
-                    self.stderr.write(self.style.WARNING(f"Skipping unsupported file type: {fp}"))
-                    continue
-            except Exception as exc:
-                self.stderr.write(self.style.ERROR(f"Failed {fp}: {exc}"))
+            fmt = forced or get_format(str(fp))
+            if fmt is None:
+                self.stderr.write(self.style.WARNING(f"Skipping unsupported file type: {fp}"))
+                continue
+
+            if options["snapshot"] or dedupe:
+                # Every file is part of the snapshot (or of the deduplicated set), so none can be skipped or resumed.
+                sources.append((str(fp), fmt, None))
                 continue
+            status, checkpoint = open_checkpoint(str(fp), force=options["force"])
+            if status == SKIP:
+                self.stdout.write(self.style.NOTICE(f"Skipping {fp}: unchanged since the last import."))
+                continue
+            if status == RESUME:
+                self.stdout.write(self.style.NOTICE(f"Resuming {fp} after {checkpoint.records} records."))
+            sources.append((str(fp), fmt, checkpoint))
+
+        # Puts back the indexes of a --bulk-load import that was killed before it could.
+        if recover_bulk_load():
+            self.stdout.write(self.style.NOTICE("Restored the indexes of an interrupted --bulk-load import."))
+        bulk_load = options["bulk_load"]
+        transaction_batches = BULK_LOAD_TRANSACTION_BATCHES if bulk_load else 1
+        loading = sqlite_bulk_load([Poi._meta.db_table]) if bulk_load and sources else nullcontext()
+
+        snapshot = options["snapshot"]
+        if snapshot and not sources:
+            raise CommandError("No readable files; refusing to apply an empty snapshot.")
+        writer = SnapshotWriter() if snapshot else WRITERS[options["writer"]]()
+        spill = None
+        if dedupe:
+            partitions = options["dedupe_partitions"] or partition_count(
+                (None, False) if path == STDIN else (Path(path).stat().st_size, is_compressed(path))
+                for path, _, _ in sources
+            )
+            spill = PartitionSpill(partitions, options["dedupe_keep"] or "last", options["dedupe_dir"])
+        # Files are only staged (spilled, or loaded into the snapshot) while they are read.
+        self.staged = bool(dedupe or snapshot)
+        self.failed = []
+        total = ImportStats()
+        started = perf_counter()
+        with ExitStack() as stack:
+            metrics = None
+            if options["metrics_file"]:
+                out = sys.stderr if options["metrics_file"] == "-" else stack.enter_context(
+                    open(options["metrics_file"], "a", encoding="utf-8")
+                )
+                metrics = stack.enter_context(ImportMetrics(out).record())
+            stack.enter_context(profiled(options["profile"]))
+            if spill is not None:
+                stack.enter_context(spill)
+            with loading:
+                self.run_sources(sources, workers, normalizer, spill or writer, transaction_batches, total, metrics)
+                if spill is not None:
+                    self.write_deduplicated(spill, writer, transaction_batches, total)
+                if snapshot:
+                    self.apply_snapshot(writer, total)
+            if metrics is not None:
+                metrics.run(total, perf_counter() - started)
+        if options["profile"]:
+            self.stdout.write(self.style.NOTICE(f"Profile written to {options['profile']}.prof/.txt/-memory.txt."))
+
+        categories = finish_import(total)
+        if categories is not None:
+            self.stdout.write(self.style.NOTICE(f"Refreshed stats for {categories} categories."))
+        self.stdout.write(self.style.SUCCESS(f"Done. Total imported: {total.processed} ({self.summary(total)})."))
+
+    def run_sources(
+        self, sources, workers: int, normalizer, writer, transaction_batches: int, total: ImportStats, metrics=None,
+    ) -> None:
+        if workers > 1:
+            # Results are keyed by path, so a path given twice is imported once.
+            unique = {}
+            for path, fmt, checkpoint in sources:
+                if path in unique:
+                    self.stdout.write(self.style.NOTICE(f"Skipping {path}: given more than once."))
+                else:
+                    unique[path] = (path, fmt, checkpoint)
+            sources = list(unique.values())
+            # Parallel runs re-read interrupted files from the start (the upsert is idempotent).
+            self.stdout.write(self.style.NOTICE(f"Importing {len(sources)} file(s) with {workers} workers ..."))
+            results = run_parallel(
+                [(path, fmt) for path, fmt, _ in sources], workers, writer=writer, normalizer=normalizer,
+                metrics=metrics,
+            )
+            for path, fmt, checkpoint in sources:
+                if not isinstance(results[path], str) and checkpoint is not None:
+                    checkpoint.finish()
+                self.report(path, results[path], total)
+        else:
+            for path, fmt, checkpoint in sources:
+                self.stdout.write(self.style.NOTICE(f"Importing {path} ..."))
+                try:
+                    pipeline = Pipeline.from_format(
+                        fmt, normalizer=normalizer, writer=writer, transaction_batches=transaction_batches,
+                        metrics=metrics,
+                    )
+                    result = pipeline.run(path, show_progress=True, checkpoint=checkpoint)
+                except Exception as exc:
+                    result = str(exc)
+                self.report(path, result, total)
+
+    def write_deduplicated(self, spill: PartitionSpill, writer, transaction_batches: int, total: ImportStats) -> None:
+        # A failed file may have been spilled in part, and its records can't be told apart from the others'.
+        if self.failed:
+            raise CommandError(
+                f"Deduplicated records not written, {len(self.failed)} file(s) failed: {', '.join(self.failed)}"
+            )
+        self.stdout.write(self.style.NOTICE(
+            f"Writing {spill.spilled} records from {len(spill.buffers)} partition(s), keeping the {spill.rule} "
+            f"copy of each external_id ..."
+        ))
+        stats = ImportStats()
+        started = perf_counter()
+        batches = spill.batches()
+        while True:
+            # Same commit grouping as the pipeline: transaction_batches batches per transaction.
+            with transaction.atomic():
+                chunk = list(islice(batches, transaction_batches))
+                for batch in chunk:
+                    stats.merge(writer.write(batch))
+            if not chunk:
+                break
+        stats.timings["write"] += perf_counter() - started
+        total.merge(stats)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {stats.processed} PoIs, dropped {spill.duplicates} duplicate records "
+            f"(inserted {stats.inserted}, updated {stats.updated}, unchanged {stats.unchanged})."
+        ))
+
+    def apply_snapshot(self, writer: SnapshotWriter, total: ImportStats) -> None:
+        # A partial snapshot would delete the PoIs of the files that failed.
+        if self.failed:
+            raise CommandError(f"Snapshot not applied, {len(self.failed)} file(s) failed: {', '.join(self.failed)}")
+        staged = writer.staged()
+        if not staged:
+            raise CommandError("The snapshot is empty; refusing to delete every PoI.")
+        self.stdout.write(self.style.NOTICE(f"Applying snapshot of {staged} PoIs ..."))
+        started = perf_counter()
+        stats = writer.apply()
+        total.merge(stats)
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot applied in {perf_counter() - started:.2f}s: inserted {stats.inserted}, "
+            f"updated {stats.updated}, unchanged {stats.unchanged}, deleted {stats.deleted}."
+        ))
 
-            total_created += created
-            self.stdout.write(self.style.SUCCESS(f"Imported {created} records from {fp}."))
+    def report(self, path: str, result, total: ImportStats) -> None:
+        if isinstance(result, str):
+            self.failed.append(path)
+            self.stderr.write(self.style.ERROR(f"Failed {path}: {result}"))
+            return
+        total.merge(result)
+        if self.staged:
+            timings = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in result.timings.items())
+            self.stdout.write(self.style.SUCCESS(
+                f"Staged {result.staged} records from {path} (rejected {result.rejected}; {timings})."
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Imported {result.processed} records from {path} ({self.summary(result)})."))
 
-        self.stdout.write(self.style.SUCCESS(f"Done. Total imported: {total_created}."))
+    def summary(self, stats: ImportStats) -> str:
+        timings = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stats.timings.items())
+        return (
+            f"inserted {stats.inserted}, updated {stats.updated}, unchanged {stats.unchanged}, "
+            + (f"deleted {stats.deleted}, " if stats.deleted else "")
+            + f"rejected {stats.rejected}; {timings}"
+        )
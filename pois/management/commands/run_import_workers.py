@@ -0,0 +1,66 @@
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pois.jobs import run_jobs
+from pois.models import ImportJob
+from pois.stats import finish_import
+from pois.utils import normalize_batch
+from pois.writers import WRITERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued import jobs (uploaded in the admin). Start one runner: it owns the "
+        "database writes, and its pool of worker processes parses the files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=2,
+            help="Parse and normalize the claimed files in N processes; 1 runs them one by one in this process.",
+        )
+        parser.add_argument("--jobs", type=int, default=10, help="Claim at most N queued jobs per round.")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty instead of polling.")
+        parser.add_argument("--writer", choices=sorted(WRITERS), default="orm", help="Writer used for the upserts (see import_pois).")
+        parser.add_argument(
+            "--exact-ratings", action="store_true",
+            help="Average ratings with Decimal arithmetic (slower) instead of the float fast path.",
+        )
+
+    def handle(self, *args, **options):
+        workers, limit = options["workers"], options["jobs"]
+        if workers < 1 or limit < 1:
+            raise CommandError("--workers and --jobs must be at least 1.")
+        normalizer = partial(normalize_batch, exact=options["exact_ratings"])
+
+        # Only one runner is expected, so running jobs were interrupted by a previous one.
+        stale = ImportJob.objects.filter(status=ImportJob.RUNNING).update(
+            status=ImportJob.QUEUED, records=0, rejected=0, rows_per_sec=None, started_at=None,
+        )
+        if stale:
+            self.stdout.write(self.style.WARNING(f"Requeued {stale} interrupted job(s)."))
+
+        while True:
+            jobs = ImportJob.claim(limit)
+            if not jobs:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(self.style.NOTICE(f"Running {len(jobs)} job(s) with {workers} worker(s) ..."))
+            total = run_jobs(jobs, workers, writer=WRITERS[options["writer"]](), normalizer=normalizer)
+            for job in jobs:
+                if job.status == ImportJob.FAILED:
+                    self.stderr.write(self.style.ERROR(f"Job {job.pk} failed: {job.error}"))
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Job {job.pk}: {job.records} records from {job.file.name} (inserted {job.inserted}, "
+                        f"updated {job.updated}, unchanged {job.unchanged}, rejected {job.rejected}; "
+                        f"{job.rows_per_sec} rows/s)."
+                    ))
+            finish_import(total)
+        self.stdout.write(self.style.SUCCESS("Queue is empty."))
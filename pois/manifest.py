@@ -0,0 +1,93 @@
+import hashlib
+import os
+from typing import Optional, Tuple
+
+from pois.models import ImportManifest
+
+HASH_READ_SIZE = 1024 * 1024
+
+# open_checkpoint() outcomes
+SKIP, RESUME, START = "skip", "resume", "start"
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class Checkpoint:
+    """
+    Tracks how far into a source file the import has committed. The pipeline calls
+    commit() inside the same transaction as each batch write, so the manifest never
+    runs ahead of (or behind) the data.
+    """
+
+    def __init__(self, entry: ImportManifest):
+        self.entry = entry
+
+    @property
+    def offset(self) -> int:
+        return self.entry.offset
+
+    @property
+    def records(self) -> int:
+        return self.entry.records
+
+    def commit(self, offset: int, records: int) -> None:
+        self.entry.offset = offset
+        self.entry.records = records
+        self.entry.save(update_fields=["offset", "records", "updated_at"])
+
+    def finish(self) -> None:
+        # Hashed once the import is done rather than up front, while the file is
+        # still in the page cache. A file changed during the import gets no hash,
+        # so the next run can't mistake it for the one that was imported.
+        entry = self.entry
+        st = os.stat(entry.path)
+        if (st.st_size, st.st_mtime) == (entry.size, entry.mtime):
+            entry.content_hash = file_digest(entry.path)
+        else:
+            entry.content_hash = ""
+        entry.completed = True
+        entry.save(update_fields=["content_hash", "completed", "updated_at"])
+
+
+def open_checkpoint(path: str, force: bool = False) -> Tuple[str, Optional[Checkpoint]]:
+    """
+    Compare the file against its manifest entry and decide what to do:
+    - SKIP: same size and mtime (or same content hash) as a completed import.
+    - RESUME: same file as an interrupted import; continue from its checkpoint.
+    - START: new or changed file; the entry is reset to the beginning.
+    The full content hash is only computed when size matches but mtime doesn't;
+    it's stored by Checkpoint.finish(), so only completed imports have one.
+    force=True always starts over.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    entry = ImportManifest.objects.filter(path=path).first()
+
+    if entry is not None and not force and entry.size == st.st_size:
+        same = entry.mtime == st.st_mtime
+        if not same and entry.content_hash:
+            same = entry.content_hash == file_digest(path)
+            if same:
+                entry.mtime = st.st_mtime
+                entry.save(update_fields=["mtime", "updated_at"])
+        if same:
+            if entry.completed:
+                return SKIP, None
+            return RESUME, Checkpoint(entry)
+
+    if entry is None:
+        entry = ImportManifest(path=path)
+    entry.size = st.st_size
+    entry.mtime = st.st_mtime
+    entry.content_hash = ""
+    entry.offset = 0
+    entry.records = 0
+    entry.completed = False
+    entry.save()
+    return START, Checkpoint(entry)
@@ -0,0 +1,147 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from django.db import connection
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage(), so no peak RSS
+    resource = None
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size; the process peak where /proc is unavailable, else None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, or None where getrusage() is unavailable."""
+    if resource is None:
+        return None
+    # ru_maxrss is bytes on macOS and KiB elsewhere.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _mib(nbytes: Optional[int]) -> Optional[float]:
+    return round(nbytes / 2 ** 20, 1) if nbytes is not None else None
+
+
+class ImportMetrics:
+    """
+    Writes one JSON object per line to `out`:
+    - "batch": rows, rejected rows, seconds per stage, DB seconds, rows/sec, RSS
+    - "file": the totals of one source file, with its peak RSS
+    - "run": the totals of the whole command
+    DB time is the time spent in cursor.execute()/executemany() on the default
+    connection while record() is active (an execute wrapper); fetching the rows
+    of a SELECT afterwards isn't included.
+    RSS figures are null where the platform can't report them.
+    """
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.db_seconds = 0.0
+        self._batch_db_seconds = 0.0
+        self._file_db_seconds: Dict[str, float] = {}
+        self._file_peak_rss: Dict[str, int] = {}
+
+    def emit(self, event: str, **fields: Any) -> None:
+        self.out.write(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}) + "\n")
+        self.out.flush()
+
+    def _time_query(self, execute, sql, params, many, context):
+        t0 = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += perf_counter() - t0
+
+    @contextmanager
+    def record(self) -> Iterator["ImportMetrics"]:
+        with connection.execute_wrapper(self._time_query):
+            yield self
+
+    def batch(self, path: str, number: int, rows: int, rejected: int, timings: Dict[str, float]) -> None:
+        db = self.db_seconds - self._batch_db_seconds
+        self._batch_db_seconds = self.db_seconds
+        self._file_db_seconds[path] = self._file_db_seconds.get(path, 0.0) + db
+        rss = rss_bytes()
+        if rss is not None:
+            self._file_peak_rss[path] = max(self._file_peak_rss.get(path, 0), rss)
+        seconds = sum(timings.values())
+        self.emit(
+            "batch", path=path, batch=number, rows=rows, rejected=rejected,
+            seconds={stage: round(s, 6) for stage, s in timings.items()},
+            db_seconds=round(db, 6),
+            rows_per_sec=round(rows / seconds, 1) if seconds else None,
+            rss_mib=_mib(rss),
+        )
+
+    def file(self, path: str, stats: Any) -> None:
+        self.emit(
+            "file", path=path, **self._totals(stats),
+            db_seconds=round(self._file_db_seconds.get(path, 0.0), 4),
+            peak_rss_mib=_mib(max(self._file_peak_rss.get(path, 0), rss_bytes() or 0) or None),
+        )
+
+    def run(self, stats: Any, seconds: float) -> None:
+        self.emit(
+            "run", **self._totals(stats), wall_seconds=round(seconds, 4),
+            rows_per_sec=round(stats.processed / seconds, 1) if seconds else None,
+            db_seconds=round(self.db_seconds, 4), peak_rss_mib=_mib(peak_rss_bytes()),
+        )
+
+    @staticmethod
+    def _totals(stats: Any) -> Dict[str, Any]:
+        return {
+            "inserted": stats.inserted, "updated": stats.updated, "unchanged": stats.unchanged,
+            "rejected": stats.rejected, "deleted": stats.deleted, "batches": stats.batches,
+            "seconds": {stage: round(s, 4) for stage, s in stats.timings.items()},
+        }
+
+
+@contextmanager
+def profiled(prefix: Optional[str]) -> Iterator[None]:
+    """
+    With a prefix, profile the block: writes PREFIX.prof (cProfile, for pstats or
+    snakeviz), PREFIX.txt (top functions by cumulative time) and PREFIX-memory.txt
+    (tracemalloc's largest allocation sites and the traced peak). Only this process
+    is profiled, not --workers subprocesses.
+    """
+    if not prefix:
+        yield
+        return
+    profile = cProfile.Profile()
+    tracemalloc.start()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profile.dump_stats(f"{prefix}.prof")
+        text = io.StringIO()
+        pstats.Stats(profile, stream=text).sort_stats("cumulative").print_stats(50)
+        with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+        with open(f"{prefix}-memory.txt", "w", encoding="utf-8") as f:
+            f.write(f"traced memory: current {_mib(current)} MiB, peak {_mib(peak)} MiB\n\n")
+            for stat in snapshot.statistics("lineno")[:30]:
+                f.write(f"{stat}\n")
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-18 07:12
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def content_hash(name, category, lat, lon, avg):
+    # Frozen copy of pois.utils.content_hash as of this migration.
+    avg = float(avg) if avg is not None else None
+    payload = "\x1f".join((name, category, repr(lat), repr(lon), repr(avg)))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def backfill_content_hash(apps, schema_editor):
+    Poi = apps.get_model("pois", "Poi")
+    batch = []
+    fields = ("name", "category", "latitude", "longitude", "avg_rating")
+    for poi in Poi.objects.only("id", *fields).iterator(chunk_size=5000):
+        poi.content_hash = content_hash(*(getattr(poi, f) for f in fields))
+        batch.append(poi)
+        if len(batch) >= 5000:
+            Poi.objects.bulk_update(batch, ["content_hash"])
+            batch = []
+    if batch:
+        Poi.objects.bulk_update(batch, ["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poi',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.2 on 2026-10-18 07:19
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_groups(apps, schema_editor):
+    Poi = apps.get_model("pois", "Poi")
+    PoiGroup = apps.get_model("pois", "PoiGroup")
+    totals = (
+        Poi.objects.values("name", "category")
+        .annotate(poi_count=Count("id"), rating_sum=Sum("avg_rating"), rating_count=Count("avg_rating"))
+        .order_by()
+    )
+    PoiGroup.objects.bulk_create(
+        (PoiGroup(**{**row, "rating_sum": row["rating_sum"] or 0}) for row in totals.iterator()),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0003_importmanifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoiGroup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('category', models.CharField(max_length=64)),
+                ('poi_count', models.BigIntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('rating_count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'category'), name='poigroup_name_category')],
+            },
+        ),
+        migrations.RunPython(backfill_groups, migrations.RunPython.noop),
+    ]
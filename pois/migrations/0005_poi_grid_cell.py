@@ -0,0 +1,48 @@
+# Generated by Django 5.1.2 on 2026-10-18 07:20
+
+from math import floor
+
+from django.db import migrations, models
+
+# Frozen copy of pois.spatial.grid_cell and its grid as of this migration.
+GRID_CELL_DEGREES = 0.05
+GRID_COLUMNS = int(round(360 / GRID_CELL_DEGREES))
+GRID_ROWS = int(round(180 / GRID_CELL_DEGREES))
+
+
+def grid_cell(lat, lon):
+    if lat is None or lon is None or not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    row = min(GRID_ROWS - 1, max(0, int(floor((lat + 90.0) / GRID_CELL_DEGREES))))
+    col = min(GRID_COLUMNS - 1, max(0, int(floor((lon + 180.0) / GRID_CELL_DEGREES))))
+    return row * GRID_COLUMNS + col
+
+
+def backfill_grid_cell(apps, schema_editor):
+    Poi = apps.get_model("pois", "Poi")
+    batch = []
+    located = Poi.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for poi in located.only("id", "latitude", "longitude").iterator(chunk_size=5000):
+        poi.grid_cell = grid_cell(poi.latitude, poi.longitude)
+        batch.append(poi)
+        if len(batch) >= 5000:
+            Poi.objects.bulk_update(batch, ["grid_cell"])
+            batch = []
+    if batch:
+        Poi.objects.bulk_update(batch, ["grid_cell"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0004_poigroup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poi',
+            name='grid_cell',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_grid_cell, migrations.RunPython.noop),
+    ]
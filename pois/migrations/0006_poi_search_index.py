@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Frozen copy of the search index statements as of this migration (see pois.search);
+# Poi.category was still a text column.
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE pois_poi_fts USING fts5("
+    "name, category, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER pois_poi_fts_ad AFTER DELETE ON pois_poi BEGIN "
+    "DELETE FROM pois_poi_fts WHERE rowid = old.id; END",
+    "INSERT INTO pois_poi_fts(rowid, name, category) SELECT id, name, category FROM pois_poi",
+]
+DROP_SQL = ["DROP TRIGGER IF EXISTS pois_poi_fts_ad", "DROP TABLE IF EXISTS pois_poi_fts"]
+
+
+def create_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends keep the admin's LIKE search.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0005_poi_grid_cell'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
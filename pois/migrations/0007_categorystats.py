@@ -0,0 +1,41 @@
+# Generated by Django 5.1.2 on 2026-10-18 07:28
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_stats(apps, schema_editor):
+    PoiGroup = apps.get_model("pois", "PoiGroup")
+    CategoryStats = apps.get_model("pois", "CategoryStats")
+    # Frozen copy of pois.stats.category_totals as of this migration.
+    totals = (
+        PoiGroup.objects.values("category")
+        .annotate(poi_count=Sum("poi_count"), rating_sum=Sum("rating_sum"), rating_count=Sum("rating_count"))
+        .order_by()
+    )
+    CategoryStats.objects.bulk_create((CategoryStats(**row) for row in totals.iterator()), batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0006_poi_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=64, unique=True)),
+                ('poi_count', models.BigIntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('rating_count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'category stats',
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
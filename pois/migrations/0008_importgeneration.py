@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 07:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0007_categorystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.BigIntegerField(default=0)),
+                ('bumped_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,88 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the search index's delete trigger as of this migration (see pois.search).
+SEARCH_TRIGGER_SQL = (
+    "CREATE TRIGGER IF NOT EXISTS pois_poi_fts_ad AFTER DELETE ON pois_poi BEGIN "
+    "DELETE FROM pois_poi_fts WHERE rowid = old.id; END"
+)
+
+
+def intern_categories(apps, schema_editor):
+    Poi = apps.get_model("pois", "Poi")
+    Category = apps.get_model("pois", "Category")
+    qn = schema_editor.quote_name
+    poi, category = qn(Poi._meta.db_table), qn(Category._meta.db_table)
+    # Set-based: one INSERT for the distinct names, one UPDATE for the references.
+    schema_editor.execute(f"INSERT INTO {category} (name) SELECT DISTINCT category FROM {poi}")
+    schema_editor.execute(
+        f"UPDATE {poi} SET category_ref_id = (SELECT c.id FROM {category} c WHERE c.name = {poi}.category)"
+    )
+
+
+def restore_category_names(apps, schema_editor):
+    Poi = apps.get_model("pois", "Poi")
+    Category = apps.get_model("pois", "Category")
+    qn = schema_editor.quote_name
+    poi, category = qn(Poi._meta.db_table), qn(Category._meta.db_table)
+    schema_editor.execute(
+        f"UPDATE {poi} SET category = (SELECT c.name FROM {category} c WHERE c.id = {poi}.category_ref_id)"
+    )
+
+
+def restore_search_trigger(apps, schema_editor):
+    # Rebuilding pois_poi on SQLite dropped the search index's delete trigger.
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite" and "pois_poi_fts" in connection.introspection.table_names():
+        schema_editor.execute(SEARCH_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0009_importjob'),
+    ]
+
+    operations = [
+        # Unapplying also rebuilds pois_poi; this restores the trigger last.
+        migrations.RunPython(migrations.RunPython.noop, restore_search_trigger),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'categories',
+            },
+        ),
+        migrations.AddField(
+            model_name='poi',
+            name='category_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='pois.category'),
+        ),
+        migrations.RunPython(intern_categories, restore_category_names),
+        # State only: unapplying RemoveField re-adds the text column, and needs a default to do so.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='poi',
+                name='category',
+                field=models.CharField(db_index=True, default='', max_length=64),
+            ),
+        ]),
+        migrations.RemoveField(
+            model_name='poi',
+            name='category',
+        ),
+        migrations.RenameField(
+            model_name='poi',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.AlterField(
+            model_name='poi',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pois', to='pois.category'),
+        ),
+        migrations.RunPython(restore_search_trigger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0010_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkLoadUndo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index_name', models.CharField(blank=True, default='', max_length=255)),
+                ('sql', models.TextField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-18 08:28
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_group_count(apps, schema_editor):
+    PoiGroup = apps.get_model("pois", "PoiGroup")
+    CategoryStats = apps.get_model("pois", "CategoryStats")
+    for category, groups in PoiGroup.objects.values_list("category").annotate(Count("pk")).order_by():
+        CategoryStats.objects.filter(category=category).update(group_count=groups)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pois', '0011_bulkloadundo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categorystats',
+            name='group_count',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_group_count, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,203 @@
-from django.db import models
+from typing import List
+
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from pois import search
+from pois.spatial import PoiQuerySet, grid_cell
+from pois.utils import content_hash
+
+
+class Category(models.Model):
+    """Interned category names; each Poi references one by its integer id."""
+    name = models.CharField(max_length=64, unique=True)
+
+    class Meta:
+        verbose_name_plural = "categories"
+
+    @classmethod
+    def named(cls, name: str) -> "Category":
+        return cls.objects.get_or_create(name=name)[0]
+
+    def save(self, *args, **kwargs):
+        # Names are copied into PoiGroup, CategoryStats and the search index, so a
+        # rename updates them too (queryset .update() calls bypass this).
+        old = Category.objects.filter(pk=self.pk).values_list("name", flat=True).first() if self.pk else None
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old is None or old == self.name:
+                return
+            PoiGroup.objects.filter(category=old).update(category=self.name)
+            CategoryStats.objects.filter(category=old).update(category=self.name)
+            if search.has_fts():
+                with connection.cursor() as cursor:
+                    search.reindex_where(cursor, "category_id = %s", [self.pk])
+            ImportGeneration.bump()
+
+    def __str__(self) -> str:
+        return self.name
+
 
 class Poi(models.Model):
     name = models.CharField(max_length=255, blank=True, default="")
     external_id = models.CharField(max_length=64, unique=True, db_index=True)
-    category = models.CharField(max_length=64, db_index=True)
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="pois")
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
     avg_rating = models.FloatField(null=True, blank=True)
+    # Spatial bucket of (latitude, longitude), see pois.spatial; backs the bbox/radius/nearest queries.
+    grid_cell = models.BigIntegerField(null=True, blank=True, db_index=True, editable=False)
+    # Digest of the imported fields (see pois.utils.content_hash); lets re-imports skip unchanged rows.
+    content_hash = models.CharField(max_length=32, blank=True, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = PoiQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.grid_cell = grid_cell(self.latitude, self.longitude)
+        self.content_hash = content_hash(self.name, self.category.name, self.latitude, self.longitude, self.avg_rating)
+        super().save(*args, **kwargs)
+        if search.has_fts():
+            with connection.cursor() as cursor:
+                search.reindex(cursor, "id", [self.pk])
+
     def __str__(self) -> str:
         return f"{self.name or '(Unnamed)'} [{self.external_id}]"
+
+
+class PoiGroup(models.Model):
+    """Running rating totals per (name, category), maintained by the import writers."""
+    name = models.CharField(max_length=255, blank=True, default="")
+    category = models.CharField(max_length=64)
+    poi_count = models.BigIntegerField(default=0)
+    # Sum and count of the PoIs' avg_rating, skipping unrated PoIs.
+    rating_sum = models.FloatField(default=0)
+    rating_count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["name", "category"], name="poigroup_name_category")]
+
+    @property
+    def avg_rating(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+
+    def __str__(self) -> str:
+        return f"{self.name or '(Unnamed)'} / {self.category}"
+
+
+class CategoryStats(models.Model):
+    """PoI count and rating totals per category, refreshed by import_pois from PoiGroup."""
+    category = models.CharField(max_length=64, unique=True)
+    poi_count = models.BigIntegerField(default=0)
+    # PoiGroup rows of the category; the group admin's estimated count.
+    group_count = models.BigIntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+    rating_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "category stats"
+
+    @property
+    def avg_rating(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+
+    def __str__(self) -> str:
+        return self.category
+
+
+class ImportManifest(models.Model):
+    """One row per imported source file: its fingerprint and the last committed position."""
+    path = models.CharField(max_length=1024, unique=True)
+    size = models.BigIntegerField()
+    mtime = models.FloatField()
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+    # Position just after the last committed batch: byte offset and raw records consumed.
+    offset = models.BigIntegerField(default=0)
+    records = models.BigIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.path} ({'done' if self.completed else f'{self.records} records'})"
+
+
+class BulkLoadUndo(models.Model):
+    """
+    A statement that undoes part of a running --bulk-load (see pois.db.sqlite_bulk_load):
+    recreating a dropped index, or resetting journal_mode. Saved before the change is
+    made and deleted once it's undone, so a killed import is repaired by the next one.
+    """
+    # Set for CREATE INDEX statements, which are skipped if the index already exists.
+    index_name = models.CharField(max_length=255, blank=True, default="")
+    sql = models.TextField()
+
+    def __str__(self) -> str:
+        return self.sql
+
+
+class ImportGeneration(models.Model):
+    """
+    Single row counting the imports (and admin edits) that changed PoIs. The API
+    derives its ETag/Last-Modified headers and response cache keys from it.
+    """
+    generation = models.BigIntegerField(default=0)
+    bumped_at = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def current(cls):
+        """(generation, bumped_at); (0, None) before the first bump."""
+        return cls.objects.filter(pk=1).values_list("generation", "bumped_at").first() or (0, None)
+
+    @classmethod
+    def bump(cls) -> None:
+        now = timezone.now()
+        if not cls.objects.filter(pk=1).update(generation=F("generation") + 1, bumped_at=now):
+            cls.objects.create(pk=1, generation=1, bumped_at=now)
+
+    def __str__(self) -> str:
+        return f"generation {self.generation}"
+
+
+class ImportJob(models.Model):
+    """
+    An uploaded file waiting for (or going through) an import by the
+    run_import_workers command. The runner keeps the counters and throughput
+    up to date while the job runs.
+    """
+    QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+    FORMAT_CHOICES = [("csv", "CSV"), ("json", "JSON"), ("ndjson", "NDJSON"), ("xml", "XML")]
+
+    file = models.FileField(upload_to="imports/%Y/%m/%d/")
+    format = models.CharField(
+        max_length=8, blank=True, choices=FORMAT_CHOICES,
+        help_text="Leave empty to use the file suffix (a.csv.gz is CSV).",
+    )
+    status = models.CharField(max_length=8, choices=STATUS_CHOICES, default=QUEUED, db_index=True)
+    # Rows handed to the writer so far.
+    records = models.BigIntegerField(default=0)
+    inserted = models.BigIntegerField(default=0)
+    updated = models.BigIntegerField(default=0)
+    unchanged = models.BigIntegerField(default=0)
+    rejected = models.BigIntegerField(default=0)
+    rows_per_sec = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def claim(cls, limit: int) -> List["ImportJob"]:
+        """Mark up to `limit` of the oldest queued jobs as running and return them."""
+        claimed = []
+        for pk in cls.objects.filter(status=cls.QUEUED).order_by("pk").values_list("pk", flat=True)[:limit]:
+            # Conditional update, so a job is only ever claimed once.
+            if cls.objects.filter(pk=pk, status=cls.QUEUED).update(status=cls.RUNNING, started_at=timezone.now()):
+                claimed.append(cls.objects.get(pk=pk))
+        return claimed
+
+    def __str__(self) -> str:
+        return f"#{self.pk} {self.file.name} ({self.status})"
@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import queue
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from django.db import connections
+
+from pois.pipeline import Format, ImportStats, Normalizer
+from pois.sources import is_compressed, open_source
+from pois.utils import normalize_batch, create_chunks, stream_progress_messages, STREAM_BATCH_SIZE
+
+# Line-oriented files are only split when each shard gets at least this much.
+MIN_SHARD_BYTES = 8 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ParseTask:
+    path: str
+    fmt: Format
+    start: int = 0
+    # None means "read the whole file with fmt.reader".
+    end: Optional[int] = None
+
+
+def plan_tasks(path: str, fmt: Format, workers: int) -> List[ParseTask]:
+    """One task per file, or byte-range shards for large uncompressed line-oriented files."""
+    size = os.path.getsize(path)
+    if fmt.shard_reader is None or workers < 2 or size < 2 * MIN_SHARD_BYTES or is_compressed(path):
+        return [ParseTask(path, fmt)]
+    shard = max(MIN_SHARD_BYTES, -(-size // (workers * 4)))
+    return [ParseTask(path, fmt, start, min(start + shard, size)) for start in range(0, size, shard)]
+
+
+_queue = None
+
+
+def _init_worker(queue) -> None:
+    global _queue
+    _queue = queue
+
+
+def _parse_task(task: ParseTask, normalizer: Normalizer, batch_size: int) -> None:
+    """
+    Worker side: read and normalize one task, streaming batches back to the writer.
+    Workers never touch the database. Messages are (kind, path, payload, nbytes).
+    """
+    stats = ImportStats()
+    timings = stats.timings
+    try:
+        with open_source(task.path) as source:
+            f = source.file
+            if task.end is None:
+                records = task.fmt.reader(f)
+            else:
+                records = task.fmt.shard_reader(f, task.start, task.end)
+            batches = create_chunks(records, batch_size)
+            while True:
+                t0 = perf_counter()
+                batch = next(batches, None)
+                t1 = perf_counter()
+                timings["read"] += t1 - t0
+                if batch is None:
+                    break
+                rows = normalizer(batch, task.fmt.file_type)
+                stats.rejected += rows.rejected
+                timings["normalize"] += perf_counter() - t1
+                stats.batches += 1
+                if rows:
+                    _queue.put(("rows", task.path, rows, 0))
+    except Exception as exc:
+        _queue.put(("failed", task.path, f"{type(exc).__name__}: {exc}", 0))
+        return
+    nbytes = (task.end if task.end is not None else os.path.getsize(task.path)) - task.start
+    _queue.put(("done", task.path, stats, nbytes))
+
+
+def run_parallel(
+    sources: List[tuple],
+    workers: int,
+    writer: Any = None,
+    normalizer: Normalizer = normalize_batch,
+    batch_size: int = STREAM_BATCH_SIZE,
+    show_progress: bool = True,
+    metrics: Any = None,
+) -> Dict[str, Any]:
+    """
+    Parse and normalize `sources` ([(path, Format), ...]) in a pool of `workers`
+    processes while this process, the only one holding a database connection,
+    writes the batches as they arrive. Returns {path: ImportStats or error message}.
+    Batches from different files (or shards) are written in arrival order.
+    `metrics` (pois.metrics.ImportMetrics) gets write-side batch events; read and
+    normalize times arrive per file, once its parse tasks are done.
+    """
+    paths = [path for path, _ in sources]
+    if len(set(paths)) != len(paths):
+        raise ValueError("run_parallel() results are keyed by path; pass each path once.")
+    if writer is None:
+        from pois.writers import OrmWriter
+        writer = OrmWriter()
+
+    tasks = [t for path, fmt in sources for t in plan_tasks(path, fmt, workers)]
+    results: Dict[str, Any] = {path: ImportStats() for path, _ in sources}
+    total_bytes = sum(os.path.getsize(path) for path, _ in sources)
+    done_bytes = 0
+    written = 0
+    batches: Dict[str, int] = dict.fromkeys(results, 0)
+
+    ctx = multiprocessing.get_context()
+    # Bounded so parsers block instead of piling batches up when the writer is the bottleneck.
+    channel = ctx.Queue(maxsize=workers * 2)
+    # Forked workers must not inherit the open SQLite connection.
+    connections.close_all()
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(channel,)) as pool:
+        pending = pool.starmap_async(_parse_task, [(t, normalizer, batch_size) for t in tasks])
+        outstanding = len(tasks)
+        while outstanding:
+            try:
+                kind, path, payload, nbytes = channel.get(timeout=1.0)
+            except queue.Empty:
+                if pending.ready():
+                    # Every task returned yet messages are missing: surface the worker error.
+                    pending.get()
+                    raise RuntimeError("Parse workers exited without reporting all results.")
+                continue
+            if kind == "rows":
+                if isinstance(results[path], str):
+                    continue
+                t0 = perf_counter()
+                try:
+                    stats = writer.write(payload)
+                except Exception as exc:
+                    results[path] = f"{type(exc).__name__}: {exc}"
+                    continue
+                seconds = perf_counter() - t0
+                stats.timings["write"] += seconds
+                results[path].merge(stats)
+                written += stats.handled
+                if metrics is not None:
+                    batches[path] += 1
+                    metrics.batch(path, batches[path], len(payload), payload.rejected, {"write": seconds})
+                if show_progress:
+                    print(stream_progress_messages(written, done_bytes, total_bytes))
+                continue
+
+            outstanding -= 1
+            if kind == "failed":
+                results[path] = payload
+            elif not isinstance(results[path], str):
+                results[path].merge(payload)
+                done_bytes += nbytes
+        pending.get()
+    if metrics is not None:
+        for path, result in results.items():
+            if not isinstance(result, str):
+                metrics.file(path, result)
+    return results
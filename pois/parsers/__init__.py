@@ -0,0 +1,2 @@
+# Importing the parser modules registers their formats with pois.pipeline.
+from pois.parsers import csv_parser, json_parser, xml_parser  # noqa: F401
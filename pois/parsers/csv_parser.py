@@ -1,42 +1,33 @@
 import csv
-from typing import Dict, Any, List
-from django.db import transaction
-from pois.models import Poi
-from pois.utils import normalize_record, calculate_chunks, create_chunks, progress_messages, save_by_name_and_category
+from typing import BinaryIO, Dict, Any, Iterable, Iterator
+from pois.pipeline import Pipeline, iter_lines_in_range, register_format
+
+
+def _decoded_lines(lines: Iterable[bytes]) -> Iterator[str]:
+    # Reading raw lines (rather than through a text wrapper) keeps f.tell() usable,
+    # and because csv pulls lines lazily it lands exactly at the end of the last row.
+    for line in lines:
+        yield line.decode("utf-8-sig")
+
+
+def iter_csv_records(f: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per CSV row, keyed by the header row."""
+    yield from csv.DictReader(_decoded_lines(f))
+
+
+def iter_csv_range(f: BinaryIO, start: int, end: int) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows starting inside the byte range [start, end), keyed by the
+    file's header row. Assumes quoted fields don't span lines.
+    """
+    f.seek(0)
+    header = next(csv.reader(_decoded_lines([f.readline()])), [])
+    start = max(start, f.tell())
+    yield from csv.DictReader(_decoded_lines(iter_lines_in_range(f, start, end)), fieldnames=header)
+
+
+register_format([".csv"], "csv", iter_csv_records, shard_reader=iter_csv_range)
 
 
 def load_csv(path: str, show_progress: bool = True) -> int:
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        rows: List[Dict[str, Any]] = list(reader)
-
-    total = len(rows)
-    if total == 0:
-        return 0
-
-    batch_size = calculate_chunks(total)
-    created = 0
-    memo = {}
-    for batch in create_chunks(rows, batch_size):
-        objs = []
-        for rec in batch:
-            data = normalize_record(rec, "csv")
-            if not data.get("external_id"):
-                continue
-            save_by_name_and_category(data, memo)
-            objs.append(Poi(
-                external_id=data["external_id"],
-                name=data["name"],
-                category=data["category"],
-                latitude=data["latitude"],
-                longitude=data["longitude"],
-                avg_rating=data["avg_rating"],
-            ))
-        if objs:
-            with transaction.atomic():
-                Poi.objects.bulk_create(objs, ignore_conflicts=True)
-                created += len(objs)
-        if show_progress and batch_size != total:
-            print(progress_messages(min(created, total), total))
-
-    return created
+    return Pipeline(iter_csv_records, "csv").run(path, show_progress).processed
@@ -1,43 +1,137 @@
+import codecs
 import json
-from typing import Dict, Any, List
-from django.db import transaction
-from pois.models import Poi
-from pois.utils import normalize_record, calculate_chunks, create_chunks, progress_messages, save_by_name_and_category
+from typing import BinaryIO, Dict, Any, Iterator
+from pois.pipeline import Pipeline, iter_lines_in_range, register_format
 
-def load_json(path: str, show_progress: bool = True) -> int:
-    with open(path, encoding="utf-8") as f:
-        payload = json.load(f)
+READ_SIZE = 64 * 1024
+WHITESPACE = " \t\n\r"
 
-    # Accept either list of objects or object with "items"
-    items = payload if isinstance(payload, list) else payload.get("items", [])
-    rows: List[Dict[str, Any]] = list(items)
-
-    total = len(rows)
-    if total == 0:
-        return 0
-
-    batch_size = calculate_chunks(total)
-    created = 0
-    memo = {}
-    for batch in create_chunks(rows, batch_size):
-        objs = []
-        for rec in batch:
-            data = normalize_record(rec, "json")
-            if not data.get("external_id"):
+
+class _JsonStream:
+    """
+    Minimal incremental JSON scanner over a binary file. Only the structural
+    characters around the records are walked by hand; each record itself is
+    decoded with JSONDecoder.raw_decode once enough of it is buffered.
+    """
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        # Incremental decoding keeps multi-byte characters split across reads intact.
+        self._text = codecs.getincrementaldecoder("utf-8-sig")()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(READ_SIZE)
+        if not chunk:
+            self.eof = True
+            self.buf = self.buf[self.pos:] + self._text.decode(b"", final=True)
+            self.pos = 0
+            return False
+        self.buf = self.buf[self.pos:] + self._text.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"Invalid JSON: expected {ch!r}, got {got or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
                 continue
-            save_by_name_and_category(data, memo)
-            objs.append(Poi(
-                external_id=data["external_id"],
-                name=data["name"],
-                category=data["category"],
-                latitude=data["latitude"],
-                longitude=data["longitude"],
-                avg_rating=data["avg_rating"]
-            ))
-        if objs:
-            with transaction.atomic():
-                Poi.objects.bulk_create(objs, ignore_conflicts=True)
-                created += len(objs)
-        if show_progress and batch_size != total:
-            print(progress_messages(min(created, total), total))
-    return created
+            self.expect("]")
+            return
+
+
+def iter_json_records(f: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yield objects one at a time from a top-level array, or from the "items" array
+    of a top-level object. Other keys of the wrapper object are skipped.
+    """
+    stream = _JsonStream(f)
+    head = stream.peek()
+    if head == "[":
+        yield from stream.array()
+        return
+    if head != "{":
+        raise ValueError("Invalid JSON: expected a list or an object with 'items'.")
+
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key == "items" and stream.peek() == "[":
+            yield from stream.array()
+        else:
+            stream.value()
+        if stream.peek() == ",":
+            stream.pos += 1
+            continue
+        stream.expect("}")
+        return
+
+
+def iter_ndjson_records(f: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Yield one object per non-blank line of newline-delimited JSON."""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_ndjson_range(f: BinaryIO, start: int, end: int) -> Iterator[Dict[str, Any]]:
+    """Yield the objects whose line starts inside the byte range [start, end)."""
+    for line in iter_lines_in_range(f, start, end):
+        if line.strip():
+            yield json.loads(line)
+
+
+register_format([".json"], "json", iter_json_records)
+register_format([".ndjson", ".jsonl"], "json", iter_ndjson_records, shard_reader=iter_ndjson_range)
+
+
+def load_json(path: str, show_progress: bool = True) -> int:
+    # Accept either list of objects or object with "items"
+    return Pipeline(iter_json_records, "json").run(path, show_progress).processed
+
+
+def load_ndjson(path: str, show_progress: bool = True) -> int:
+    return Pipeline(iter_ndjson_records, "json").run(path, show_progress).processed
@@ -1,8 +1,9 @@
 from xml.etree import ElementTree as ET
-from typing import Dict, Any, List
-from django.db import transaction
-from pois.models import Poi
-from pois.utils import normalize_record, calculate_chunks, create_chunks, progress_messages
+from typing import BinaryIO, Dict, Any, Iterator, List
+from pois.pipeline import Pipeline, register_format
+
+
+RECORD_TAG = "DATA_RECORD"
 
 
 def element_to_dict(el: ET.Element) -> Dict[str, Any]:
@@ -14,79 +15,36 @@ def element_to_dict(el: ET.Element) -> Dict[str, Any]:
     return d
 
 
-def load_xml(path: str, show_progress: bool = True) -> int:
-    tree = ET.parse(path)
-    root = tree.getroot()
-
-    poi_nodes = root.findall(".//DATA_RECORD") or list(root)
-
-    rows: List[Dict[str, Any]] = [element_to_dict(node) for node in poi_nodes]
-
-    total = len(rows)
-    if total == 0:
-        return 0
-
-    batch_size = calculate_chunks(total)
-    processed = 0
-
-    # This list has Fields that are allowed to change on updates
-    updatable_fields = ["name", "category", "latitude", "longitude", "avg_rating"]
-
-    for batch in create_chunks(rows, batch_size):
-        to_insert: List[Poi] = []
-
-        track_incoming_poi_data: Dict[str, Dict[str, Any]] = {}
-
-        for rec in batch:
-            data = normalize_record(rec, "xml")
-            ext_id = data.get("external_id")
-            if not ext_id:
-                continue
-            track_incoming_poi_data[ext_id] = data
-            to_insert.append(Poi(
-                external_id=ext_id,
-                name=data["name"],
-                category=data["category"],
-                latitude=data["latitude"],
-                longitude=data["longitude"],
-                avg_rating=data["avg_rating"],
-            ))
-
-        if not track_incoming_poi_data:
+def iter_xml_records(f: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally parse the document and yield one record dict per DATA_RECORD.
+    Each element is cleared and detached from its parent once consumed, so memory
+    stays flat regardless of file size. Documents without any DATA_RECORD fall back
+    to treating the root's direct children as records.
+    """
+    stack: List[ET.Element] = []
+    seen_record = False
+    for event, el in ET.iterparse(f, events=("start", "end")):
+        if event == "start":
+            stack.append(el)
             continue
 
-        with transaction.atomic():
-            if to_insert:
-                Poi.objects.bulk_create(to_insert, ignore_conflicts=True)
-
-            ext_ids = list(track_incoming_poi_data.keys())
-            existing = Poi.objects.filter(external_id__in=ext_ids).only(
-                "id", "external_id", "name", "category", "latitude", "longitude", "avg_rating",
-            )
+        stack.pop()
+        parent = stack[-1] if stack else None
+        if el.tag == RECORD_TAG:
+            seen_record = True
+        elif not (len(stack) == 1 and not seen_record):
+            # Fields inside a record, wrappers, or the root itself.
+            continue
 
-            to_update: List[Poi] = []
-            for obj in existing:
-                data = track_incoming_poi_data[obj.external_id]
-                changed = False
-                if obj.name != data["name"]:
-                    obj.name = data["name"]; changed = True
-                if obj.category != data["category"]:
-                    obj.category = data["category"]; changed = True
-                if obj.latitude != data["latitude"]:
-                    obj.latitude = data["latitude"]; changed = True
-                if obj.longitude != data["longitude"]:
-                    obj.longitude = data["longitude"]; changed = True
-                if obj.avg_rating != data["avg_rating"]:
-                    obj.avg_rating = data["avg_rating"]; changed = True
-                if changed:
-                    to_update.append(obj)
+        yield element_to_dict(el)
+        el.clear()
+        if parent is not None:
+            parent.remove(el)
 
-            if to_update:
-                Poi.objects.bulk_update(to_update, updatable_fields)
 
-        processed += len(track_incoming_poi_data)
+register_format([".xml"], "xml", iter_xml_records)
 
-        if show_progress and batch_size != total:
-            print(progress_messages(min(processed, total), total))
 
-    return processed
+def load_xml(path: str, show_progress: bool = True) -> int:
+    return Pipeline(iter_xml_records, "xml").run(path, show_progress).processed
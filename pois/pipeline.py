@@ -0,0 +1,216 @@
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from itertools import islice
+from time import perf_counter
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+
+from pois.sources import data_suffix, open_source
+from pois.utils import PoiBatch, normalize_batch, create_chunks, stream_progress_messages, STREAM_BATCH_SIZE
+
+Reader = Callable[[BinaryIO], Iterator[Dict[str, Any]]]
+# (file, start, end) -> records whose line starts inside [start, end)
+ShardReader = Callable[[BinaryIO, int, int], Iterator[Dict[str, Any]]]
+# (raw records, file_type) -> PoiBatch
+Normalizer = Callable[[List[Dict[str, Any]], str], PoiBatch]
+
+STAGES = ("read", "normalize", "write")
+
+
+@dataclass
+class ImportStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Rows dropped before the writer, e.g. missing external_id.
+    rejected: int = 0
+    # Stored PoIs missing from a --snapshot import.
+    deleted: int = 0
+    # Rows taken by a staging writer (--snapshot, --dedupe) and written later.
+    staged: int = 0
+    batches: int = 0
+    timings: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+
+    @property
+    def processed(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+    @property
+    def handled(self) -> int:
+        """Rows written or staged so far, for progress messages."""
+        return self.processed + self.staged
+
+    def merge(self, other: "ImportStats") -> None:
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.rejected += other.rejected
+        self.deleted += other.deleted
+        self.staged += other.staged
+        self.batches += other.batches
+        for stage, seconds in other.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+
+@dataclass(frozen=True)
+class Format:
+    file_type: str
+    reader: Reader
+    # Set for line-oriented formats that can be split into byte ranges.
+    shard_reader: Optional[ShardReader] = None
+
+
+# Suffix (".csv", ".jsonl", ...) -> Format. Parser modules register themselves on import.
+FORMATS: Dict[str, Format] = {}
+
+
+def register_format(
+    suffixes: Iterable[str], file_type: str, reader: Reader, shard_reader: Optional[ShardReader] = None,
+) -> Format:
+    fmt = Format(file_type=file_type, reader=reader, shard_reader=shard_reader)
+    for suffix in suffixes:
+        FORMATS[suffix.lower()] = fmt
+    return fmt
+
+
+def iter_lines_in_range(f: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+    """
+    Yield the lines of f that start at an offset in [start, end). A line straddling
+    `start` belongs to the previous range, so adjacent ranges never overlap.
+    """
+    if start > 0:
+        f.seek(start - 1)
+        # Only skip ahead when start lands mid-line.
+        if f.read(1) != b"\n":
+            f.readline()
+    else:
+        f.seek(0)
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            return
+        yield line
+
+
+def get_format(path: str) -> Optional[Format]:
+    """Format for a path's suffix; a compression suffix is skipped (a.csv.gz is CSV)."""
+    return format_named(data_suffix(path).lstrip("."))
+
+
+def format_named(name: str) -> Optional[Format]:
+    """Format by name or suffix without the dot ("csv", "ndjson", "jsonl", ...)."""
+    import pois.parsers  # noqa: F401  (registers the built-in formats)
+    return FORMATS.get("." + name.lower()) if name else None
+
+
+class Pipeline:
+    """
+    Read -> normalize -> write, one batch at a time. Each stage can be swapped
+    independently and the time spent in each is accumulated in ImportStats.timings.
+    - reader: callable taking a binary file and yielding raw records.
+    - normalizer: callable (records, file_type) -> PoiBatch (see normalize_batch).
+    - writer: object with write(PoiBatch) -> ImportStats, e.g. pois.writers.OrmWriter.
+    - range_reader: optional ShardReader used to resume from a byte offset.
+    - transaction_batches: number of batches committed together in one transaction.
+    - metrics: optional pois.metrics.ImportMetrics receiving per-batch and per-file events.
+    When run() is given a checkpoint (see pois.manifest), reading resumes from its
+    position and each batch's checkpoint is committed in the same transaction as the write.
+    """
+
+    def __init__(
+        self,
+        reader: Reader,
+        file_type: str,
+        normalizer: Normalizer = normalize_batch,
+        writer: Any = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        range_reader: Optional[ShardReader] = None,
+        transaction_batches: int = 1,
+        metrics: Any = None,
+    ):
+        if writer is None:
+            from pois.writers import OrmWriter
+            writer = OrmWriter()
+        self.reader = reader
+        self.file_type = file_type
+        self.normalizer = normalizer
+        self.writer = writer
+        self.batch_size = batch_size
+        self.range_reader = range_reader
+        self.transaction_batches = max(1, transaction_batches)
+        self.metrics = metrics
+
+    @classmethod
+    def from_format(cls, fmt: Format, **kwargs) -> "Pipeline":
+        return cls(fmt.reader, fmt.file_type, range_reader=fmt.shard_reader, **kwargs)
+
+    @classmethod
+    def for_path(cls, path: str, **kwargs) -> "Pipeline":
+        fmt = get_format(path)
+        if fmt is None:
+            raise ValueError(f"Unsupported file type: {path}")
+        return cls.from_format(fmt, **kwargs)
+
+    def _records(self, f: BinaryIO, size: int, seekable: bool, checkpoint: Any) -> Iterator[Dict[str, Any]]:
+        if checkpoint is None or not checkpoint.records:
+            return self.reader(f)
+        if self.range_reader is not None and seekable:
+            return self.range_reader(f, checkpoint.offset, size)
+        # Formats (and compressed inputs) that can't seek re-parse the committed records without writing them.
+        return islice(self.reader(f), checkpoint.records, None)
+
+    def run(self, path: str, show_progress: bool = True, checkpoint: Any = None) -> ImportStats:
+        """Import a file (plain or gzip/bz2/xz compressed), or stdin when path is "-"."""
+        from django.db import transaction
+
+        stats = ImportStats()
+        timings = stats.timings
+        consumed = checkpoint.records if checkpoint is not None else 0
+        uncommitted = 0
+        with open_source(path) as source, ExitStack() as txn:
+            f, size = source.file, source.size
+            batches = create_chunks(self._records(f, size, source.seekable, checkpoint), self.batch_size)
+            while True:
+                t0 = perf_counter()
+                batch = next(batches, None)
+                t1 = perf_counter()
+                timings["read"] += t1 - t0
+                if batch is None:
+                    break
+
+                rows = self.normalizer(batch, self.file_type)
+                stats.rejected += rows.rejected
+                t2 = perf_counter()
+                timings["normalize"] += t2 - t1
+
+                consumed += len(batch)
+                if not uncommitted:
+                    txn.enter_context(transaction.atomic())
+                if rows:
+                    stats.merge(self.writer.write(rows))
+                if checkpoint is not None:
+                    checkpoint.commit(f.tell(), consumed)
+                uncommitted += 1
+                if uncommitted >= self.transaction_batches:
+                    txn.close()
+                    uncommitted = 0
+                t3 = perf_counter()
+                timings["write"] += t3 - t2
+                stats.batches += 1
+                if self.metrics is not None:
+                    self.metrics.batch(
+                        path, stats.batches, len(rows), rows.rejected,
+                        {"read": t1 - t0, "normalize": t2 - t1, "write": t3 - t2},
+                    )
+
+                if show_progress:
+                    print(stream_progress_messages(stats.handled, source.position(), size))
+            txn.close()
+        if checkpoint is not None:
+            checkpoint.finish()
+        if self.metrics is not None:
+            self.metrics.file(path, stats)
+        return stats
+
+
+def run_import(path: str, show_progress: bool = True, checkpoint: Any = None, **kwargs) -> ImportStats:
+    return Pipeline.for_path(path, **kwargs).run(path, show_progress=show_progress, checkpoint=checkpoint)
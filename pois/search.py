@@ -0,0 +1,54 @@
+import re
+from typing import Optional
+
+from django.db import connection as default_connection
+
+# FTS5 index over Poi.name and Poi.category, keyed by rowid = Poi.id. The import
+# writers and Poi.save() reindex the rows they write (set-based, one statement per
+# batch: per-row triggers made imports ~5x slower); a delete trigger drops removed
+# PoIs. Created by migration 0006 on SQLite only. The category text comes from
+# the Category row a PoI references; Category.save() reindexes renamed ones.
+FTS_TABLE = "pois_poi_fts"
+POI_TABLE = "pois_poi"
+CATEGORY_TABLE = "pois_category"
+# Index entries of the PoIs; a WHERE clause on the PoI table can be appended.
+INDEXED_ROWS_SQL = (
+    f"SELECT id, name, (SELECT name FROM {CATEGORY_TABLE} WHERE {CATEGORY_TABLE}.id = {POI_TABLE}.category_id) "
+    f"FROM {POI_TABLE}"
+)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def has_fts(connection=None) -> bool:
+    connection = connection or default_connection
+    return connection.vendor == "sqlite" and FTS_TABLE in connection.introspection.table_names()
+
+
+def fts_query(term: str) -> Optional[str]:
+    """
+    MATCH expression for a search box term: every word must match the start of a word
+    in name or category ("caf ber" finds "Café Berlin"). None if the term has no words.
+    """
+    words = _TOKEN.findall(term)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def matching_ids_sql() -> str:
+    """Subquery selecting the ids of PoIs matching a MATCH expression parameter."""
+    return f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+
+
+def reindex(cursor, column: str, values: list) -> None:
+    """Refresh the index entries of the PoIs whose `column` is in `values`."""
+    if not values:
+        return
+    reindex_where(cursor, f"{column} IN ({', '.join(['%s'] * len(values))})", values)
+
+
+def reindex_where(cursor, where: str, params: list) -> None:
+    """Refresh the index entries of the PoIs matching a WHERE clause on the PoI table."""
+    cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT id FROM {POI_TABLE} WHERE {where})", params)
+    cursor.execute(f"INSERT INTO {FTS_TABLE}(rowid, name, category) {INDEXED_ROWS_SQL} WHERE {where}", params)
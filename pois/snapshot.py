@@ -0,0 +1,137 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from pois import search
+from pois.categories import CategoryCache
+from pois.models import Category, ImportManifest, Poi, PoiGroup
+from pois.pipeline import ImportStats
+from pois.spatial import grid_cell
+from pois.utils import PoiBatch, content_hash
+from pois.writers import ROW_FIELDS
+
+# Connection-local tables holding one snapshot while it's loaded and applied.
+STAGE_TABLE = "pois_snapshot_stage"
+CHANGED_TABLE = "pois_snapshot_changed"
+
+
+class SnapshotWriter:
+    """
+    Treats the imported files as the complete set of PoIs. write() only stages rows
+    in a TEMP table (later rows win, like the upsert writers); apply() then makes
+    the PoI table match the stage with set-based statements in one transaction:
+    anti-joins on external_id find the inserts and the deletes, a content_hash
+    comparison the updates. Readers see either the old or the new snapshot.
+
+    The stage lives on the database connection, so write() and apply() must run on
+    the same one; it's created on the first write (after run_parallel reconnects).
+    """
+
+    def __init__(self):
+        self.qn = connection.ops.quote_name
+        self.staged_batches = 0
+        self.categories = CategoryCache()
+        self._created = False
+
+    def _create_stage(self, cursor) -> None:
+        qn = self.qn
+        cursor.execute(f"DROP TABLE IF EXISTS temp.{qn(STAGE_TABLE)}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {qn(STAGE_TABLE)} ({qn('external_id')} TEXT PRIMARY KEY, "
+            + ", ".join(qn(c) for c in ROW_FIELDS) + ")"
+        )
+        self._created = True
+
+    def write(self, batch: PoiBatch) -> ImportStats:
+        rows = []
+        category_ids = self.categories.resolve(batch.categories)
+        for ext_id, name, category, lat, lon, avg in batch.rows():
+            avg = float(avg) if avg is not None else None
+            rows.append((
+                ext_id, name, category_ids[category], lat, lon, avg, grid_cell(lat, lon),
+                content_hash(name, category, lat, lon, avg),
+            ))
+        with connection.cursor() as cursor:
+            if not self._created:
+                self._create_stage(cursor)
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {self.qn(STAGE_TABLE)} VALUES ({', '.join(['%s'] * (len(ROW_FIELDS) + 1))})",
+                rows,
+            )
+        self.staged_batches += 1
+        # Nothing is written to the PoI table until apply().
+        return ImportStats(staged=len(rows))
+
+    def staged(self) -> int:
+        if not self._created:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {self.qn(STAGE_TABLE)}")
+            return cursor.fetchone()[0]
+
+    def apply(self) -> ImportStats:
+        """Sync the PoI table to the stage; returns exact inserted/updated/unchanged/deleted counts."""
+        qn = self.qn
+        poi, stage, changed = qn(Poi._meta.db_table), qn(STAGE_TABLE), qn(CHANGED_TABLE)
+        ext_id = qn("external_id")
+        stats = ImportStats()
+        if not self._created:
+            with connection.cursor() as cursor:
+                self._create_stage(cursor)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Staged rows that are new or differ from the stored ones; is_new tells which.
+            cursor.execute(f"DROP TABLE IF EXISTS temp.{changed}")
+            cursor.execute(f"CREATE TEMP TABLE {changed} ({ext_id} TEXT PRIMARY KEY, is_new INTEGER)")
+            cursor.execute(
+                f"INSERT INTO {changed} SELECT s.{ext_id}, p.{qn('id')} IS NULL FROM {stage} s "
+                f"LEFT JOIN {poi} p ON p.{ext_id} = s.{ext_id} "
+                f"WHERE p.{qn('id')} IS NULL OR p.{qn('content_hash')} <> s.{qn('content_hash')}"
+            )
+            cursor.execute(f"SELECT COALESCE(SUM(is_new), 0), COUNT(*) FROM {changed}")
+            stats.inserted, changes = cursor.fetchone()
+            stats.updated = changes - stats.inserted
+            cursor.execute(f"SELECT COUNT(*) FROM {stage}")
+            stats.unchanged = cursor.fetchone()[0] - changes
+
+            # The FTS delete trigger drops the index entries of deleted rows.
+            cursor.execute(
+                f"DELETE FROM {poi} WHERE NOT EXISTS "
+                f"(SELECT 1 FROM {stage} s WHERE s.{ext_id} = {poi}.{ext_id})"
+            )
+            stats.deleted = cursor.rowcount
+            if stats.deleted:
+                # The manifest would skip files holding the deleted rows as already imported.
+                ImportManifest.objects.all().delete()
+
+            if changes:
+                now = connection.ops.adapt_datetimefield_value(timezone.now())
+                columns = [ext_id, *(qn(c) for c in ROW_FIELDS)]
+                cursor.execute(
+                    f"INSERT INTO {poi} ({', '.join(columns)}, {qn('created_at')}, {qn('updated_at')}) "
+                    f"SELECT {', '.join('s.' + c for c in columns)}, %s, %s FROM {stage} s "
+                    f"JOIN {changed} c ON c.{ext_id} = s.{ext_id} WHERE true "
+                    f"ON CONFLICT ({ext_id}) DO UPDATE SET "
+                    + ", ".join(f"{c} = excluded.{c}" for c in [*columns[1:], qn("updated_at")]),
+                    [now, now],
+                )
+                if search.has_fts():
+                    search.reindex_where(cursor, f"{ext_id} IN (SELECT {ext_id} FROM {changed})", [])
+            if changes or stats.deleted:
+                rebuild_groups(cursor)
+            cursor.execute(f"DROP TABLE {changed}")
+            cursor.execute(f"DROP TABLE {stage}")
+        self._created = False
+        return stats
+
+
+def rebuild_groups(cursor) -> None:
+    """Recompute PoiGroup from the PoI table with one INSERT ... SELECT ... GROUP BY."""
+    qn = connection.ops.quote_name
+    group, poi, category = qn(PoiGroup._meta.db_table), qn(Poi._meta.db_table), qn(Category._meta.db_table)
+    name, avg = qn("name"), qn("avg_rating")
+    cursor.execute(f"DELETE FROM {group}")
+    cursor.execute(
+        f"INSERT INTO {group} ({name}, {qn('category')}, {qn('poi_count')}, {qn('rating_sum')}, {qn('rating_count')}) "
+        f"SELECT p.{name}, c.{name}, COUNT(*), COALESCE(SUM(p.{avg}), 0), COUNT(p.{avg}) "
+        f"FROM {poi} p JOIN {category} c ON c.{qn('id')} = p.{qn('category_id')} GROUP BY p.{name}, c.{name}"
+    )
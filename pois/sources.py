@@ -0,0 +1,107 @@
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, Optional
+
+# Path meaning "read standard input".
+STDIN = "-"
+
+# Uncompressed files at least this big are memory-mapped instead of read through a buffer.
+MMAP_MIN_BYTES = 64 * 1024 * 1024
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+MAGIC_BYTES = {b"\x1f\x8b": "gzip", b"BZh": "bz2", b"\xfd7zXZ\x00": "xz"}
+DECOMPRESSORS: Dict[str, Callable[[BinaryIO], BinaryIO]] = {
+    "gzip": lambda f: gzip.GzipFile(fileobj=f, mode="rb"),
+    "bz2": lambda f: bz2.BZ2File(f, mode="rb"),
+    "xz": lambda f: lzma.LZMAFile(f, mode="rb"),
+}
+
+
+def data_suffix(path: str) -> str:
+    """Suffix naming the data format, skipping a compression suffix: a.csv.gz -> .csv."""
+    suffixes = [s.lower() for s in Path(path).suffixes]
+    if suffixes and suffixes[-1] in COMPRESSION_SUFFIXES:
+        suffixes.pop()
+    return suffixes[-1] if suffixes else ""
+
+
+def detect_compression(path: str, head: bytes) -> Optional[str]:
+    """Compression named by the last suffix, else recognised from the first bytes."""
+    suffix = Path(path).suffix.lower()
+    if suffix in COMPRESSION_SUFFIXES:
+        return COMPRESSION_SUFFIXES[suffix]
+    for magic, name in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def is_compressed(path: str) -> bool:
+    if path == STDIN:
+        return False
+    with open(path, "rb") as f:
+        return detect_compression(path, f.read(6)) is not None
+
+
+class MappedFile(mmap.mmap):
+    """Read-only memory map that iterates by line like a binary file."""
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self.readline, b"")
+
+    def seekable(self) -> bool:
+        return True
+
+
+class Source:
+    """
+    An opened input: `file` yields the decompressed bytes, `size` is the size on disk
+    (0 for stdin). Only plain files are `seekable`, i.e. support byte-range reads.
+    """
+
+    def __init__(self, file: BinaryIO, raw: BinaryIO, size: int, compression: Optional[str], seekable: bool):
+        self.file = file
+        self.raw = raw
+        self.size = size
+        self.compression = compression
+        self.seekable = seekable
+
+    def position(self) -> int:
+        """Bytes of the input consumed so far (compressed bytes for compressed input)."""
+        try:
+            return self.raw.tell()
+        except (OSError, ValueError):
+            return 0
+
+
+@contextmanager
+def open_source(path: str) -> Iterator[Source]:
+    """Open a file (or STDIN) for reading, decompressing gzip/bz2/xz transparently."""
+    if path == STDIN:
+        raw = sys.stdin.buffer
+        if not hasattr(raw, "peek"):
+            raw = io.BufferedReader(raw)
+        compression = detect_compression("", raw.peek(6)[:6])
+        file = DECOMPRESSORS[compression](raw) if compression else raw
+        yield Source(file, raw, 0, compression, seekable=False)
+        return
+
+    with open(path, "rb") as raw:
+        size = os.fstat(raw.fileno()).st_size
+        compression = detect_compression(path, raw.read(6))
+        raw.seek(0)
+        if compression:
+            with DECOMPRESSORS[compression](raw) as file:
+                yield Source(file, raw, size, compression, seekable=False)
+        elif size >= MMAP_MIN_BYTES:
+            with MappedFile(raw.fileno(), 0, access=mmap.ACCESS_READ) as file:
+                yield Source(file, file, size, None, seekable=True)
+        else:
+            yield Source(raw, raw, size, None, seekable=True)
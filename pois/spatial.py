@@ -0,0 +1,123 @@
+from math import cos, floor, radians
+from typing import List, Optional, Tuple
+
+from django.db import models
+from django.db.models import F, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+# Poi.grid_cell buckets coordinates into GRID_CELL_DEGREES squares numbered row-major
+# from (-90, -180); a bbox becomes one indexed grid_cell range per row of cells.
+GRID_CELL_DEGREES = 0.05
+GRID_COLUMNS = int(round(360 / GRID_CELL_DEGREES))
+GRID_ROWS = int(round(180 / GRID_CELL_DEGREES))
+
+EARTH_RADIUS_KM = 6371.0088
+# Half the circumference: no two points are further apart.
+MAX_DISTANCE_KM = 20037.5
+KM_PER_DEGREE = 111.32
+# Boxes needing more grid_cell ranges than this skip the grid index (a scan beats a huge OR).
+MAX_GRID_RANGES = 200
+
+
+def _row(lat: float) -> int:
+    return min(GRID_ROWS - 1, max(0, int(floor((lat + 90.0) / GRID_CELL_DEGREES))))
+
+
+def _col(lon: float) -> int:
+    return min(GRID_COLUMNS - 1, max(0, int(floor((lon + 180.0) / GRID_CELL_DEGREES))))
+
+
+def grid_cell(lat: Optional[float], lon: Optional[float]) -> Optional[int]:
+    """Grid cell id for a coordinate, or None when either part is missing or out of range."""
+    if lat is None or lon is None or not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    return _row(lat) * GRID_COLUMNS + _col(lon)
+
+
+def grid_ranges(min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Tuple[int, int]]:
+    """Inclusive grid_cell ranges covering the box (min_lon > max_lon wraps the antimeridian)."""
+    if min_lon <= max_lon:
+        spans = [(_col(min_lon), _col(max_lon))]
+    else:
+        spans = [(_col(min_lon), GRID_COLUMNS - 1), (0, _col(max_lon))]
+    cells = sorted(
+        (row * GRID_COLUMNS + lo, row * GRID_COLUMNS + hi)
+        for row in range(_row(min_lat), _row(max_lat) + 1)
+        for lo, hi in spans
+    )
+    # Ranges that touch (full-width rows, wrapped spans) are merged into one.
+    ranges: List[Tuple[int, int]] = []
+    for lo, hi in cells:
+        if ranges and ranges[-1][1] + 1 >= lo:
+            ranges[-1] = (ranges[-1][0], max(ranges[-1][1], hi))
+        else:
+            ranges.append((lo, hi))
+    return ranges
+
+
+def radius_bbox(lat: float, lon: float, km: float) -> Tuple[float, float, float, float]:
+    dlat = km / KM_PER_DEGREE
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # Near the poles the box spans every longitude.
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 89.9:
+        return min_lat, -180.0, max_lat, 180.0
+    dlon = km / (KM_PER_DEGREE * cos(radians(widest)))
+    if dlon >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def haversine_km(lat: float, lon: float):
+    """Expression for the great-circle distance from (lat, lon) to each row, in km."""
+    dlat = Radians(F("latitude") - Value(lat)) / 2
+    dlon = Radians(F("longitude") - Value(lon)) / 2
+    a = Power(Sin(dlat), 2) + cos(radians(lat)) * Cos(Radians(F("latitude"))) * Power(Sin(dlon), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+class PoiQuerySet(models.QuerySet):
+    def with_distance(self, lat: float, lon: float) -> "PoiQuerySet":
+        """Annotate distance_km from (lat, lon) without narrowing the rows (a full scan)."""
+        return self.annotate(distance_km=haversine_km(lat, lon))
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> "PoiQuerySet":
+        """PoIs inside the box. min_lon > max_lon selects a box crossing the antimeridian."""
+        if min_lon <= max_lon:
+            exact = Q(longitude__gte=min_lon, longitude__lte=max_lon)
+        else:
+            exact = Q(longitude__gte=min_lon) | Q(longitude__lte=max_lon)
+        exact &= Q(latitude__gte=min_lat, latitude__lte=max_lat)
+
+        ranges = grid_ranges(min_lat, min_lon, max_lat, max_lon)
+        if len(ranges) > MAX_GRID_RANGES:
+            return self.filter(exact)
+        cells = Q()
+        for lo, hi in ranges:
+            cells |= Q(grid_cell__gte=lo, grid_cell__lte=hi)
+        return self.filter(cells, exact)
+
+    def within_radius(self, lat: float, lon: float, km: float) -> "PoiQuerySet":
+        """PoIs within `km` of (lat, lon), annotated with distance_km."""
+        return (
+            self.within_bbox(*radius_bbox(lat, lon, km))
+            .with_distance(lat, lon)
+            .filter(distance_km__lte=km)
+        )
+
+    def nearest(self, lat: float, lon: float, k: int = 10, start_km: float = 1.0) -> List[models.Model]:
+        """
+        The k PoIs closest to (lat, lon), nearest first, with distance_km set.
+        Searches a radius that doubles until it holds k PoIs (or covers the globe).
+        """
+        km = start_km
+        while True:
+            found = list(self.within_radius(lat, lon, km).order_by("distance_km")[:k])
+            if len(found) >= k or km >= MAX_DISTANCE_KM:
+                return found
+            km *= 2
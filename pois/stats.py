@@ -0,0 +1,40 @@
+from typing import Any, Optional
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from pois.models import CategoryStats, ImportGeneration, PoiGroup
+
+
+def category_totals():
+    """Per-category totals folded from the (name, category) groups, so PoIs aren't rescanned."""
+    return (
+        PoiGroup.objects.values("category")
+        .annotate(
+            poi_count=Sum("poi_count"), rating_sum=Sum("rating_sum"), rating_count=Sum("rating_count"),
+            group_count=Count("pk"),
+        )
+        .order_by()
+    )
+
+
+def refresh_category_stats() -> int:
+    """Replace CategoryStats with the current totals; returns the number of categories."""
+    rows = [CategoryStats(**row) for row in category_totals()]
+    with transaction.atomic():
+        CategoryStats.objects.all().delete()
+        CategoryStats.objects.bulk_create(rows, batch_size=5000)
+    return len(rows)
+
+
+def finish_import(stats: Any) -> Optional[int]:
+    """
+    Run after every import: if it changed any PoIs, refresh CategoryStats and bump
+    the import generation, which invalidates the API caches and ETags. Returns the
+    number of categories refreshed, or None if nothing changed.
+    """
+    if not (stats.inserted or stats.updated or stats.deleted):
+        return None
+    categories = refresh_category_stats()
+    ImportGeneration.bump()
+    return categories
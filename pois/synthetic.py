@@ -0,0 +1,118 @@
+import bz2
+import gzip
+import json
+import lzma
+import random
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, TextIO
+from xml.sax.saxutils import escape
+
+from pois.sources import COMPRESSION_SUFFIXES
+from pois.utils import FIELD_MAPS
+
+# Deterministic fake PoIs for benchmarks: the same (rows, seed) always produces the
+# same records, in the layouts the parsers read. A small share of records lacks an
+# external_id, coordinates or ratings, like real feeds.
+CATEGORIES = ["restaurant", "cafe", "bar", "museum", "park", "hotel", "shop", "pharmacy", "bakery", "gym"]
+WORDS = ["Golden", "Old", "Green", "Royal", "Little", "Corner", "City", "River", "Blue", "Grand", "Café", "Zur Post"]
+MISSING_ID_RATE = 0.001
+MISSING_COORDINATES_RATE = 0.02
+MISSING_RATINGS_RATE = 0.05
+
+
+def row_count(value: str) -> int:
+    """Parse a row count such as 10000, 10k or 10m (an argparse type)."""
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:].lower(), 1)
+    rows = int(value[:-1] if multiplier > 1 else value) * multiplier
+    if rows < 1:
+        raise ValueError(value)
+    return rows
+
+
+def synthetic_records(rows: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """(id, name, category, latitude, longitude, ratings) dicts; ratings is a list of ints."""
+    rng = random.Random(seed)
+    for i in range(rows):
+        has_coordinates = rng.random() >= MISSING_COORDINATES_RATE
+        has_ratings = rng.random() >= MISSING_RATINGS_RATE
+        yield {
+            "id": "" if rng.random() < MISSING_ID_RATE else f"syn{i}",
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i % 997}",
+            "category": rng.choice(CATEGORIES),
+            "latitude": round(rng.uniform(-90, 90), 6) if has_coordinates else None,
+            "longitude": round(rng.uniform(-180, 180), 6) if has_coordinates else None,
+            "ratings": [rng.randint(1, 5) for _ in range(rng.randint(1, 8))] if has_ratings else [],
+        }
+
+
+def _braced(ratings) -> str:
+    return "{" + ",".join(map(str, ratings)) + "}" if ratings else ""
+
+
+def _coordinate(value) -> str:
+    return "" if value is None else repr(value)
+
+
+def write_csv(out: TextIO, records: Iterator[Dict[str, Any]]) -> None:
+    out.write(",".join(FIELD_MAPS["csv"]) + "\n")
+    for r in records:
+        # Names never contain quotes or commas, so only the ratings need quoting.
+        out.write(f'{r["id"]},{r["name"]},{r["category"]},{_coordinate(r["latitude"])},'
+                  f'{_coordinate(r["longitude"])},"{_braced(r["ratings"])}"\n')
+
+
+def _json_record(r: Dict[str, Any]) -> str:
+    return json.dumps({
+        "id": r["id"],
+        "name": r["name"],
+        "category": r["category"],
+        "coordinates": {"latitude": r["latitude"], "longitude": r["longitude"]},
+        "ratings": _braced(r["ratings"]),
+    }, ensure_ascii=False)
+
+
+def write_json(out: TextIO, records: Iterator[Dict[str, Any]]) -> None:
+    out.write('{"items": [')
+    for i, r in enumerate(records):
+        out.write(",\n" if i else "\n")
+        out.write(_json_record(r))
+    out.write("\n]}\n")
+
+
+def write_ndjson(out: TextIO, records: Iterator[Dict[str, Any]]) -> None:
+    for r in records:
+        out.write(_json_record(r) + "\n")
+
+
+def write_xml(out: TextIO, records: Iterator[Dict[str, Any]]) -> None:
+    tags = FIELD_MAPS["xml"]
+    out.write('<?xml version="1.0" encoding="utf-8"?>\n<RECORDS>\n')
+    for r in records:
+        values = (r["id"], r["name"], r["category"], _coordinate(r["latitude"]),
+                  _coordinate(r["longitude"]), _braced(r["ratings"]))
+        fields = "".join(f"<{tag}>{escape(str(v))}</{tag}>" for tag, v in zip(tags, values))
+        out.write(f"<DATA_RECORD>{fields}</DATA_RECORD>\n")
+    out.write("</RECORDS>\n")
+
+
+SYNTHETIC_WRITERS: Dict[str, Callable[[TextIO, Iterator[Dict[str, Any]]], None]] = {
+    "csv": write_csv,
+    "json": write_json,
+    "ndjson": write_ndjson,
+    "xml": write_xml,
+}
+
+
+# Compression name (see pois.sources.COMPRESSION_SUFFIXES) -> opener for the output.
+COMPRESSED_OPENERS = {"gzip": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+
+def generate(path: str, fmt: str, rows: int, seed: int = 0) -> None:
+    """
+    Write `rows` synthetic PoIs to `path` in format `fmt`, streaming (constant memory).
+    A .gz, .bz2 or .xz suffix compresses the output, as import_pois expects.
+    """
+    compression = COMPRESSION_SUFFIXES.get(Path(path).suffix.lower())
+    opener = COMPRESSED_OPENERS[compression] if compression else open
+    with opener(path, "wt", encoding="utf-8", newline="") as out:
+        SYNTHETIC_WRITERS[fmt](out, synthetic_records(rows, seed))
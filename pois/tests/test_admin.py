@@ -0,0 +1,102 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from pois.models import CategoryStats, Poi, PoiGroup
+from pois.stats import refresh_category_stats
+from pois.utils import normalize_batch
+from pois.writers import RawWriter, group_deltas
+
+URL = "/admin/pois/poi/"
+
+
+class LargeTableChangelistTests(TestCase):
+    def setUp(self):
+        RawWriter().write(normalize_batch(
+            [{"id": str(i), "name": f"P{i}", "category": "food" if i % 2 else "bar", "ratings": [i % 5 + 1]}
+             for i in range(250)],
+            "json",
+        ))
+        refresh_category_stats()
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+
+    def test_category_stats(self):
+        food = CategoryStats.objects.get(category="food")
+        self.assertEqual(food.poi_count, 125)
+        self.assertEqual(food.avg_rating, 3.0)
+
+    def test_sidebar_and_count_come_from_stats(self):
+        CategoryStats.objects.filter(category="food").update(poi_count=1000)
+        response = self.client.get(URL)
+        self.assertContains(response, "food (1000, avg 3.0)")
+        self.assertEqual(response.context["cl"].result_count, 1125)
+        self.assertEqual(self.client.get(URL, {"category": "food"}).context["cl"].result_count, 1000)
+        # Searches are counted for real.
+        self.assertEqual(self.client.get(URL, {"q": "P17"}).context["cl"].result_count, 11)
+
+    def test_group_changelist_counts_come_from_stats(self):
+        self.assertEqual(CategoryStats.objects.get(category="food").group_count, 125)
+        CategoryStats.objects.filter(category="food").update(group_count=1000)
+        url = "/admin/pois/poigroup/"
+        with CaptureQueriesContext(connection) as queries:
+            cl = self.client.get(url).context["cl"]
+        self.assertFalse([q["sql"] for q in queries if "COUNT(" in q["sql"] and '"pois_poigroup"' in q["sql"]])
+        self.assertEqual(cl.result_count, 1125)
+        self.assertFalse(cl.show_full_result_count)
+        self.assertEqual(self.client.get(url, {"category": "food"}).context["cl"].result_count, 1000)
+        self.assertEqual(self.client.get(url, {"q": "P17"}).context["cl"].result_count, 11)
+
+    def test_keyset_pages(self):
+        ids = list(Poi.objects.order_by("-pk").values_list("pk", flat=True))
+        cl = self.client.get(URL).context["cl"]
+        self.assertEqual(cl.next_page_url, f"?after={ids[99]}")
+        cl = self.client.get(URL + cl.next_page_url).context["cl"]
+        self.assertEqual([p.pk for p in cl.result_list], ids[100:200])
+        self.assertEqual(cl.first_page_url, "?")
+        cl = self.client.get(URL, {"after": ids[199], "category": "bar"}).context["cl"]
+        bar = Poi.objects.filter(pk__lt=ids[199], category__name="bar").order_by("-pk")
+        self.assertEqual([p.pk for p in cl.result_list], list(bar.values_list("pk", flat=True)))
+        self.assertIsNone(cl.next_page_url)
+
+
+class AdminEditTests(TestCase):
+    RECORDS = [
+        {"id": "1", "name": "A", "category": "food", "ratings": [4]},
+        {"id": "2", "name": "A", "category": "food", "ratings": [2]},
+        {"id": "3", "name": "B", "category": "bar", "ratings": None},
+    ]
+
+    def setUp(self):
+        RawWriter().write(normalize_batch(self.RECORDS, "json"))
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+
+    def assertGroupsMatchPois(self):
+        groups = {(g.name, g.category): [g.poi_count, g.rating_sum, g.rating_count] for g in PoiGroup.objects.all()}
+        self.assertEqual(groups, group_deltas(Poi.objects.all(), 1))
+
+    def test_edit_moves_the_poi_between_groups(self):
+        poi = Poi.objects.get(external_id="1")
+        response = self.client.post(f"{URL}{poi.pk}/change/", {
+            "name": "B", "external_id": "1", "category": Poi.objects.get(external_id="3").category_id,
+            "latitude": "", "longitude": "", "avg_rating": "5",
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(PoiGroup.objects.get(name="A").poi_count, 1)
+        self.assertEqual(PoiGroup.objects.get(name="B").rating_sum, 5.0)
+        self.assertGroupsMatchPois()
+
+    def test_delete_then_reimport(self):
+        poi = Poi.objects.get(external_id="3")
+        self.client.post(f"{URL}{poi.pk}/delete/", {"post": "yes"})
+        self.assertFalse(PoiGroup.objects.filter(name="B").exists())
+        RawWriter().write(normalize_batch(self.RECORDS[2:], "json"))
+        self.assertEqual(PoiGroup.objects.get(name="B").poi_count, 1)
+        self.assertGroupsMatchPois()
+
+    def test_bulk_delete(self):
+        ids = Poi.objects.filter(external_id__in=["1", "3"]).values_list("pk", flat=True)
+        self.client.post(URL, {"action": "delete_selected", "_selected_action": list(ids), "post": "yes"})
+        self.assertEqual(Poi.objects.count(), 1)
+        self.assertEqual(PoiGroup.objects.get(name="A").poi_count, 1)
+        self.assertGroupsMatchPois()
@@ -0,0 +1,58 @@
+from django.test import TestCase
+
+from pois.models import Category, ImportGeneration, Poi
+from pois.views import response_cache
+
+
+class PoiApiTests(TestCase):
+    def setUp(self):
+        response_cache.entries.clear()
+        for i, (category, rating) in enumerate([("food", 4.5), ("bar", 2.0), ("food", 3.0), ("food", None)]):
+            Poi.objects.create(external_id=f"x{i}", name=f"P{i}", category=Category.named(category), avg_rating=rating)
+        ImportGeneration.bump()
+
+    def ids(self, response):
+        return [row["external_id"] for row in response.json()["results"]]
+
+    def test_filters(self):
+        self.assertEqual(self.ids(self.client.get("/api/pois/", {"category": "food"})), ["x0", "x2", "x3"])
+        self.assertEqual(self.ids(self.client.get("/api/pois/", {"min_rating": 2.5, "max_rating": 4})), ["x2"])
+        self.assertEqual(self.client.get("/api/pois/", {"min_rating": "high"}).status_code, 400)
+
+    def test_keyset_pagination(self):
+        seen, url = [], "/api/pois/?category=food&limit=2"
+        while url:
+            page = self.client.get(url).json()
+            seen += [row["external_id"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, ["x0", "x2", "x3"])
+
+    def test_detail(self):
+        self.assertEqual(self.client.get("/api/pois/x1/").json()["category"], "bar")
+        self.assertEqual(self.client.get("/api/pois/missing/").status_code, 404)
+
+    def test_external_id_with_slashes(self):
+        Poi.objects.create(external_id="osm/node/7", name="Slashed", category=Category.named("food"))
+        self.assertEqual(self.client.get("/api/pois/osm/node/7/").json()["name"], "Slashed")
+
+    def test_head_requests(self):
+        first = self.client.head("/api/pois/x0/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.head("/api/pois/x0/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        self.assertEqual(self.client.head("/api/pois/").status_code, 200)
+        self.assertEqual(self.client.post("/api/pois/").status_code, 405)
+
+    def test_conditional_get_and_cache_follow_the_generation(self):
+        first = self.client.get("/api/pois/x0/")
+        self.assertEqual(self.client.get("/api/pois/x0/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        Poi.objects.filter(external_id="x0").update(name="Renamed")
+        # Same generation: served from the cache.
+        self.assertEqual(self.client.get("/api/pois/x0/").json()["name"], "P0")
+
+        ImportGeneration.bump()
+        second = self.client.get("/api/pois/x0/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()["name"], "Renamed")
+        self.assertNotEqual(second["ETag"], first["ETag"])
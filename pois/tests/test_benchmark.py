@@ -0,0 +1,78 @@
+import os
+import tempfile
+from django.test import SimpleTestCase, TestCase
+
+from pois.benchmark import find_regressions, run_benchmark
+from pois.models import Poi
+from pois.pipeline import format_named, get_format
+from pois.sources import detect_compression, open_source
+from pois.synthetic import SYNTHETIC_WRITERS, generate
+from pois.utils import normalize_batch
+from pois.writers import RawWriter
+
+
+def run_import_rows(path: str):
+    """The normalized rows import_pois would read from path."""
+    file_format = get_format(path)
+    with open_source(path) as source:
+        return normalize_batch(list(file_format.reader(source.file)), file_format.file_type).rows()
+
+
+class SyntheticDataTests(SimpleTestCase):
+    def generate(self, fmt: str, rows: int = 2000, seed: int = 0) -> str:
+        fd, path = tempfile.mkstemp(suffix="." + fmt)
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        generate(path, fmt, rows, seed)
+        return path
+
+    def test_every_format_parses_to_the_same_rows(self):
+        parsed = {}
+        for fmt in SYNTHETIC_WRITERS:
+            path = self.generate(fmt)
+            file_format = format_named(fmt)
+            with open(path, "rb") as f:
+                batch = normalize_batch(list(file_format.reader(f)), file_format.file_type)
+            self.assertEqual(len(batch) + batch.rejected, 2000, fmt)
+            parsed[fmt] = list(batch.rows())
+        self.assertGreater(len(parsed["csv"]), 1900)
+        for fmt, rows in parsed.items():
+            self.assertEqual(rows, parsed["csv"], fmt)
+
+    def test_compressed_output(self):
+        expected = list(run_import_rows(self.generate("csv")))
+        for suffix in (".csv.gz", ".csv.bz2", ".csv.xz"):
+            fd, path = tempfile.mkstemp(suffix=suffix)
+            os.close(fd)
+            self.addCleanup(os.remove, path)
+            generate(path, "csv", 2000)
+            with open(path, "rb") as f:
+                # By magic bytes, not the suffix.
+                self.assertIsNotNone(detect_compression("", f.read(6)), suffix)
+            self.assertEqual(list(run_import_rows(path)), expected, suffix)
+
+    def test_deterministic(self):
+        with open(self.generate("csv", seed=7), "rb") as a, open(self.generate("csv", seed=7), "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_find_regressions(self):
+        def results(rps, rss):
+            stage = {"rows_per_sec": rps, "peak_rss_mib": rss}
+            return {"formats": {"csv": {**stage, "stages": {"read": stage, "normalize": stage, "write": stage}}}}
+
+        self.assertEqual(find_regressions(results(90, 100), results(100, 100), 0.2), [])
+        self.assertEqual(len(find_regressions(results(70, 100), results(100, 100), 0.2)), 4)
+        self.assertEqual(len(find_regressions(results(100, 130), results(100, 100), 0.2)), 4)
+
+
+class RunBenchmarkTests(TestCase):
+    def test_reports_every_stage_and_rolls_back(self):
+        fd, path = tempfile.mkstemp(suffix=".xml")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        generate(path, "xml", 500)
+        result = run_benchmark(path, format_named("xml"), RawWriter(), 500)
+        self.assertEqual(result["processed"] + result["rejected"], 500)
+        self.assertEqual(set(result["stages"]), {"read", "normalize", "write"})
+        self.assertGreater(result["stages"]["write"]["peak_rss_mib"], 0)
+        self.assertEqual(Poi.objects.count(), 0)
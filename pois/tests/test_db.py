@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from pois.db import recover_bulk_load, secondary_indexes, sqlite_bulk_load
+from pois.models import BulkLoadUndo, Category, Poi
+
+
+class SqliteBulkLoadTests(TransactionTestCase):
+    def index_names(self):
+        with connection.cursor() as cursor:
+            return {name for name, _ in secondary_indexes(cursor, Poi._meta.db_table)}
+
+    def test_drops_and_rebuilds_secondary_indexes(self):
+        before = self.index_names()
+        self.assertTrue(before)
+        with sqlite_bulk_load([Poi._meta.db_table]):
+            self.assertEqual(self.index_names(), set())
+            Poi.objects.create(external_id="1", category=Category.named("food"))
+        self.assertEqual(self.index_names(), before)
+
+    def test_restores_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA cache_size")
+            before = cursor.fetchone()[0]
+            with sqlite_bulk_load([Poi._meta.db_table]):
+                cursor.execute("PRAGMA cache_size")
+                self.assertEqual(cursor.fetchone()[0], -524288)
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], before)
+
+    def crash_inside_bulk_load(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA cache_size")
+            cache_size = cursor.fetchone()[0]
+        self.addCleanup(lambda: connection.cursor().execute(f"PRAGMA cache_size = {cache_size}"))
+        # Killed inside the block: nothing after the load gets to run.
+        with mock.patch("pois.db.recover_bulk_load", side_effect=[0, SystemExit]):
+            with self.assertRaises(SystemExit):
+                with sqlite_bulk_load([Poi._meta.db_table]):
+                    Poi.objects.create(external_id="1", category=Category.named("food"))
+
+    def test_recovers_indexes_after_a_crash(self):
+        before = self.index_names()
+        self.crash_inside_bulk_load()
+        self.assertEqual(self.index_names(), set())
+        self.assertTrue(BulkLoadUndo.objects.exists())
+
+        # The indexes, ANALYZE and journal_mode.
+        self.assertEqual(recover_bulk_load(), len(before) + 2)
+        self.assertEqual(self.index_names(), before)
+        self.assertFalse(BulkLoadUndo.objects.exists())
+        self.assertEqual(recover_bulk_load(), 0)
+
+    def test_next_bulk_load_recovers_first(self):
+        before = self.index_names()
+        self.crash_inside_bulk_load()
+        with sqlite_bulk_load([Poi._meta.db_table]):
+            self.assertEqual(BulkLoadUndo.objects.filter(index_name__gt="").count(), len(before))
+        self.assertEqual(self.index_names(), before)
+        self.assertFalse(BulkLoadUndo.objects.exists())
@@ -0,0 +1,99 @@
+import io
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from pois import dedupe
+from pois.dedupe import PartitionSpill, partition_count
+from pois.models import Poi
+from pois.utils import PoiBatch
+
+HEADER = "poi_id,poi_name,poi_category,poi_latitude,poi_longitude,poi_ratings\n"
+
+
+def batch(*rows):
+    return PoiBatch(
+        [ext_id for ext_id, _ in rows], [name for _, name in rows], ["c"] * len(rows),
+        [None] * len(rows), [None] * len(rows), [None] * len(rows),
+    )
+
+
+class PartitionSpillTests(SimpleTestCase):
+    def survivors(self, rule, partitions=3):
+        with PartitionSpill(partitions, rule) as spill:
+            spill.write(batch(("1", "a"), ("2", "b"), ("1", "c")))
+            self.assertEqual(spill.write(batch(("3", "d"), ("2", "e"))).staged, 2)
+            spill.write(batch(("1", "f")))
+            rows = {row[0]: row[1] for out in spill.batches(batch_size=2) for row in out.rows()}
+            return rows, spill.duplicates
+
+    def test_rules(self):
+        self.assertEqual(self.survivors("last"), ({"1": "f", "2": "e", "3": "d"}, 3))
+        self.assertEqual(self.survivors("first"), ({"1": "a", "2": "b", "3": "d"}, 3))
+
+    def test_spilled_rows_keep_their_order(self):
+        # Flush every row to disk.
+        with mock.patch.object(dedupe, "SPILL_BUFFER_ROWS", 1):
+            self.assertEqual(self.survivors("last", partitions=2)[0], {"1": "f", "2": "e", "3": "d"})
+
+    def test_temporary_files_are_removed(self):
+        with PartitionSpill(4) as spill:
+            with mock.patch.object(dedupe, "SPILL_BUFFER_ROWS", 1):
+                spill.write(batch(("1", "a"), ("2", "b")))
+            directory = Path(spill.tmp.name)
+            self.assertTrue(any(directory.iterdir()))
+        self.assertFalse(directory.exists())
+
+    def test_partition_count(self):
+        mib = 1024 * 1024
+        self.assertEqual(partition_count([(10, False)]), 1)
+        self.assertEqual(partition_count([(100 * mib, False), (40 * mib, True)]), 5)
+        self.assertEqual(partition_count([(10, False), (None, False)]), dedupe.DEFAULT_PARTITIONS)
+
+
+class DedupeCommandTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.first = Path(tmp.name) / "a.csv"
+        self.first.write_text(HEADER + "1,A,food,,,{1}\n1,A2,food,,,{2}\n2,B,bar,,,\n")
+        self.second = Path(tmp.name) / "b.csv"
+        self.second.write_text(HEADER + "1,A3,food,,,{3}\n")
+
+    def names(self, *args):
+        out = io.StringIO()
+        # The pipeline prints its progress.
+        with redirect_stdout(io.StringIO()):
+            call_command("import_pois", str(self.first), str(self.second), *args, stdout=out)
+        return dict(Poi.objects.values_list("external_id", "name")), out.getvalue()
+
+    def test_last_and_first(self):
+        names, out = self.names("--dedupe")
+        self.assertEqual(names, {"1": "A3", "2": "B"})
+        self.assertIn("Wrote 2 PoIs, dropped 2 duplicate records", out)
+        self.assertIn("Staged 3 records from", out)
+        self.assertEqual(self.names("--dedupe", "--dedupe-keep", "first")[0], {"1": "A", "2": "B"})
+
+    def test_flag_before_paths(self):
+        with redirect_stdout(io.StringIO()):
+            call_command("import_pois", "--dedupe", str(self.first), str(self.second), stdout=io.StringIO())
+        self.assertEqual(dict(Poi.objects.values_list("external_id", "name")), {"1": "A3", "2": "B"})
+        with self.assertRaises(CommandError):
+            self.names("--dedupe-keep", "first")
+
+    def test_failed_file_writes_nothing(self):
+        broken = self.first.with_name("broken.json")
+        broken.write_text('[{"id": "9", "name": "X"')
+        with self.assertRaisesMessage(CommandError, "1 file(s) failed"), redirect_stdout(io.StringIO()):
+            call_command(
+                "import_pois", "--dedupe", str(self.first), str(broken), stdout=io.StringIO(), stderr=io.StringIO(),
+            )
+        self.assertFalse(Poi.objects.exists())
+
+    def test_needs_one_worker(self):
+        with self.assertRaises(CommandError):
+            self.names("--dedupe", "--workers", "2")
@@ -0,0 +1,50 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from django.core.management import call_command
+from django.test import TestCase
+
+from pois.models import Poi
+from pois.pipeline import run_import
+from pois.utils import normalize_batch
+from pois.writers import RawWriter
+
+RECORDS = [
+    {"id": "1", "name": 'Café "Zur Post", Berlin', "category": "food",
+     "coordinates": {"latitude": 52.520008, "longitude": 13.404954}, "ratings": [4, 5, 3]},
+    {"id": "2", "name": "", "category": "bar", "coordinates": None, "ratings": None},
+    {"id": "3", "name": "Line\nbreak", "category": "食べ物", "coordinates": {"latitude": -0.1, "longitude": 1e-07},
+     "ratings": "{1,2}"},
+]
+FIELDS = ("external_id", "name", "category__name", "latitude", "longitude", "avg_rating", "content_hash")
+
+
+class ExportRoundTripTests(TestCase):
+    def setUp(self):
+        RawWriter().write(normalize_batch(RECORDS, "json"))
+        self.expected = list(Poi.objects.order_by("external_id").values_list(*FIELDS))
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def export(self, name: str, *args) -> str:
+        path = os.path.join(self.tmp, name)
+        call_command("export_pois", path, *args, stdout=io.StringIO())
+        return path
+
+    def test_export_then_import_is_lossless(self):
+        for name in ("out.csv", "out.json", "out.ndjson"):
+            path = self.export(name)
+            Poi.objects.all().delete()
+            stats = run_import(path, show_progress=False)
+            self.assertEqual(stats.inserted, 3, name)
+            self.assertEqual(list(Poi.objects.order_by("external_id").values_list(*FIELDS)), self.expected, name)
+
+    def test_gzip_and_category(self):
+        path = self.export("out.ndjson.gz", "--category", "bar")
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row["id"] for row in rows], ["2"])
+        self.assertEqual(rows[0]["ratings"], [])
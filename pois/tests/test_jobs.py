@@ -0,0 +1,62 @@
+import io
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from pois.jobs import run_jobs
+from pois.models import CategoryStats, ImportJob, Poi
+
+CSV = b"poi_id,poi_name,poi_category,poi_latitude,poi_longitude,poi_ratings\n1,A,food,1.0,2.0,\"{4,5}\"\n,B,bar,,,\n"
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def queue(self, name, content, **fields):
+        job = ImportJob(**fields)
+        job.file.save(name, ContentFile(content))
+        return job
+
+    def test_claim_takes_each_job_once(self):
+        first, second = self.queue("a.csv", CSV), self.queue("b.csv", CSV)
+        self.assertEqual([job.pk for job in ImportJob.claim(1)], [first.pk])
+        self.assertEqual([job.pk for job in ImportJob.claim(5)], [second.pk])
+        self.assertEqual(ImportJob.claim(5), [])
+        self.assertEqual(ImportJob.objects.get(pk=first.pk).status, ImportJob.RUNNING)
+
+    def test_run_jobs_records_outcome(self):
+        self.queue("a.csv", CSV)
+        self.queue("b.dat", b'{"id": "2", "name": "C", "category": "bar"}\n', format="ndjson")
+        self.queue("c.txt", CSV)
+        total = run_jobs(ImportJob.claim(5), workers=1)
+        self.assertEqual((total.inserted, total.rejected), (2, 1))
+        jobs = list(ImportJob.objects.order_by("pk").values_list("status", "records", "inserted", "rejected"))
+        self.assertEqual(jobs, [("done", 1, 1, 1), ("done", 1, 1, 0), ("failed", 0, 0, 0)])
+        self.assertIn("Unsupported file type", ImportJob.objects.get(status="failed").error)
+        self.assertEqual(Poi.objects.get(external_id="1").avg_rating, 4.5)
+
+    def test_command_drains_queue_and_refreshes_stats(self):
+        self.queue("a.csv", CSV)
+        # Left running by a runner that was stopped.
+        self.queue("b.csv", CSV, status=ImportJob.RUNNING)
+        call_command("run_import_workers", "--once", "--workers", "1", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(list(ImportJob.objects.values_list("status", flat=True)), ["done", "done"])
+        self.assertEqual(CategoryStats.objects.get(category="food").poi_count, 1)
+
+    def test_admin_upload_queues_a_job(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pw"))
+        response = self.client.post("/admin/pois/importjob/add/", {"file": SimpleUploadedFile("up.csv", CSV), "format": ""})
+        self.assertEqual(response.status_code, 302)
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, ImportJob.QUEUED)
+        self.assertFalse(Poi.objects.exists())
+        self.assertContains(self.client.get("/admin/pois/poi/"), "/admin/pois/importjob/add/")
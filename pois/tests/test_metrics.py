@@ -0,0 +1,53 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+
+from pois.metrics import ImportMetrics, peak_rss_bytes, profiled, rss_bytes
+from pois.pipeline import Pipeline
+from pois.tests.test_pipeline import CSV_HEADER, write_temp
+
+
+class ImportMetricsTests(TestCase):
+    def test_batch_and_file_events(self):
+        path = write_temp(CSV_HEADER + "1,A,c,,,\n,no id,c,,,\n2,B,c,,,\n3,C,c,,,\n", ".csv")
+        self.addCleanup(os.remove, path)
+        out = io.StringIO()
+        with ImportMetrics(out).record() as metrics:
+            stats = Pipeline.for_path(path, batch_size=2, metrics=metrics).run(path, show_progress=False)
+            metrics.run(stats, 1.0)
+        events = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        self.assertEqual([e["event"] for e in events], ["batch", "batch", "file", "run"])
+        first, second, file, run = events
+        self.assertEqual((first["rows"], first["rejected"]), (1, 1))
+        self.assertEqual((second["rows"], second["rejected"]), (2, 0))
+        self.assertEqual(set(first["seconds"]), {"read", "normalize", "write"})
+        self.assertGreater(first["db_seconds"], 0)
+        self.assertGreater(first["rss_mib"], 0)
+        self.assertEqual((file["inserted"], file["rejected"], file["batches"]), (3, 1, 2))
+        self.assertEqual(run["rows_per_sec"], 3.0)
+
+    def test_rss_without_resource_module(self):
+        # As on Windows: no resource module and no /proc.
+        with mock.patch("pois.metrics.resource", None), mock.patch("builtins.open", side_effect=OSError):
+            self.assertIsNone(peak_rss_bytes())
+            self.assertIsNone(rss_bytes())
+            out = io.StringIO()
+            metrics = ImportMetrics(out)
+            metrics.batch("a.csv", 1, 1, 0, {"read": 0.1})
+        self.assertIsNone(json.loads(out.getvalue())["rss_mib"])
+
+
+class ProfiledTests(TestCase):
+    def test_writes_reports(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        prefix = os.path.join(tmp.name, "run")
+        with profiled(prefix):
+            sorted(range(1000), key=str)
+        for suffix in (".prof", ".txt", "-memory.txt"):
+            self.assertTrue(os.path.getsize(prefix + suffix), suffix)
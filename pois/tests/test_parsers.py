@@ -0,0 +1,105 @@
+import io
+import json
+from unittest import mock
+from django.test import SimpleTestCase
+
+from pois.parsers import json_parser
+from pois.parsers.csv_parser import iter_csv_range, iter_csv_records
+from pois.parsers.json_parser import iter_json_records, iter_ndjson_range, iter_ndjson_records
+from pois.parsers.xml_parser import iter_xml_records
+
+
+class IterXmlRecordsTests(SimpleTestCase):
+    def test_yields_data_records(self):
+        doc = (
+            b"<RECORDS>"
+            b"<DATA_RECORD><pid>1</pid><pname> A </pname></DATA_RECORD>"
+            b"<DATA_RECORD><pid>2</pid><pname>B</pname></DATA_RECORD>"
+            b"</RECORDS>"
+        )
+        self.assertEqual(
+            list(iter_xml_records(io.BytesIO(doc))),
+            [{"pid": "1", "pname": "A"}, {"pid": "2", "pname": "B"}],
+        )
+
+    def test_nested_data_records(self):
+        doc = b"<root><RECORDS><DATA_RECORD><pid>1</pid></DATA_RECORD></RECORDS><meta>x</meta></root>"
+        self.assertEqual(list(iter_xml_records(io.BytesIO(doc))), [{"pid": "1"}])
+
+    def test_falls_back_to_root_children(self):
+        doc = b"<root><poi><pid>1</pid></poi><poi><pid>2</pid></poi></root>"
+        self.assertEqual(list(iter_xml_records(io.BytesIO(doc))), [{"pid": "1"}, {"pid": "2"}])
+
+
+class IterJsonRecordsTests(SimpleTestCase):
+    def test_top_level_list(self):
+        doc = b'[{"id": 1, "name": "A"}, {"id": 2, "coordinates": {"latitude": 1.5}}]'
+        self.assertEqual(
+            list(iter_json_records(io.BytesIO(doc))),
+            [{"id": 1, "name": "A"}, {"id": 2, "coordinates": {"latitude": 1.5}}],
+        )
+
+    def test_items_wrapper_skips_other_keys(self):
+        doc = b'{"meta": {"n": [1, 2]}, "items": [{"id": "a"}], "next": null}'
+        self.assertEqual(list(iter_json_records(io.BytesIO(doc))), [{"id": "a"}])
+
+    def test_empty_inputs(self):
+        self.assertEqual(list(iter_json_records(io.BytesIO(b" [ ] "))), [])
+        self.assertEqual(list(iter_json_records(io.BytesIO(b"{}"))), [])
+        self.assertEqual(list(iter_json_records(io.BytesIO(b'{"other": 1}'))), [])
+
+    def test_records_split_across_reads(self):
+        items = [{"id": i, "name": "caf\u00e9 \u2603", "ratings": [i, 12345]} for i in range(200)]
+        doc = ("[" + ", ".join(json.dumps(x, ensure_ascii=False) for x in items) + "]").encode()
+        with mock.patch.object(json_parser, "READ_SIZE", 7):
+            self.assertEqual(list(iter_json_records(io.BytesIO(doc))), items)
+
+    def test_invalid_document(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_records(io.BytesIO(b'[{"id": 1},')))
+        with self.assertRaises(ValueError):
+            list(iter_json_records(io.BytesIO(b'"scalar"')))
+
+    def test_ndjson_skips_blank_lines(self):
+        doc = b'{"id": 1}\n\n  \n{"id": 2}\n'
+        self.assertEqual(list(iter_ndjson_records(io.BytesIO(doc))), [{"id": 1}, {"id": 2}])
+
+
+class IterCsvRecordsTests(SimpleTestCase):
+    def test_rows_and_quoted_newlines(self):
+        doc = b'poi_id,poi_name,poi_ratings\r\n1,"Two\nLines","{1,2}"\r\n2,B,\r\n'
+        self.assertEqual(
+            list(iter_csv_records(io.BytesIO(doc))),
+            [
+                {"poi_id": "1", "poi_name": "Two\nLines", "poi_ratings": "{1,2}"},
+                {"poi_id": "2", "poi_name": "B", "poi_ratings": ""},
+            ],
+        )
+
+    def test_offset_lands_at_end_of_last_yielded_row(self):
+        doc = b"poi_id,poi_name\n1,A\n2,B\n"
+        f = io.BytesIO(doc)
+        it = iter_csv_records(f)
+        next(it)
+        self.assertEqual(f.tell(), len(b"poi_id,poi_name\n1,A\n"))
+
+
+class ShardReaderTests(SimpleTestCase):
+    def assert_shards_cover(self, reader, doc: bytes, expected: list):
+        f = io.BytesIO(doc)
+        for step in range(1, len(doc) + 1):
+            got = []
+            for start in range(0, len(doc), step):
+                got.extend(reader(f, start, min(start + step, len(doc))))
+            self.assertEqual(got, expected, f"shard size {step}")
+
+    def test_csv_shards_yield_each_row_once(self):
+        doc = b"poi_id,poi_name\n1,A\n22,BB\n333,CCC\n"
+        self.assert_shards_cover(
+            iter_csv_range, doc,
+            [{"poi_id": "1", "poi_name": "A"}, {"poi_id": "22", "poi_name": "BB"}, {"poi_id": "333", "poi_name": "CCC"}],
+        )
+
+    def test_ndjson_shards_yield_each_object_once(self):
+        doc = b'{"id": 1}\n\n{"id": 22}\n{"id": 333}'
+        self.assert_shards_cover(iter_ndjson_range, doc, [{"id": 1}, {"id": 22}, {"id": 333}])
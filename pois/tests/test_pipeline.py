@@ -0,0 +1,136 @@
+import os
+import tempfile
+from django.test import SimpleTestCase, TestCase
+
+from pois.manifest import RESUME, SKIP, START, file_digest, open_checkpoint
+from pois.models import ImportManifest, Poi
+from pois.parallel import run_parallel
+from pois.parsers.csv_parser import iter_csv_records
+from pois.pipeline import Pipeline, get_format
+from pois.writers import OrmWriter
+
+CSV_HEADER = "poi_id,poi_name,poi_category,poi_latitude,poi_longitude,poi_ratings\n"
+
+
+def write_temp(content: str, suffix: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+
+class FormatRegistryTests(SimpleTestCase):
+    def test_dispatch_by_suffix(self):
+        self.assertEqual(get_format("a/b.CSV").file_type, "csv")
+        self.assertEqual(get_format("x.jsonl").file_type, "json")
+        self.assertEqual(get_format("x.ndjson").file_type, "json")
+        self.assertEqual(get_format("x.xml").file_type, "xml")
+        self.assertIsNone(get_format("x.txt"))
+
+    def test_run_parallel_rejects_repeated_paths(self):
+        fmt = get_format("a.csv")
+        with self.assertRaises(ValueError):
+            run_parallel([("a.csv", fmt), ("a.csv", fmt)], workers=2)
+
+
+class PipelineTests(TestCase):
+    def run_csv(self, body: str, **kwargs):
+        path = write_temp(CSV_HEADER + body, ".csv")
+        self.addCleanup(os.remove, path)
+        return Pipeline(iter_csv_records, "csv", **kwargs).run(path, show_progress=False)
+
+    def test_insert_update_unchanged_counts(self):
+        stats = self.run_csv('1,A,food,1.0,2.0,"{3,4}"\n2,B,food,,,\n,NoId,food,,,\n')
+        self.assertEqual((stats.inserted, stats.updated, stats.unchanged, stats.rejected), (2, 0, 0, 1))
+
+        stats = self.run_csv('1,A,food,1.0,2.0,"{3,4}"\n2,B2,food,,,\n3,C,bar,,,"{5}"\n')
+        self.assertEqual((stats.inserted, stats.updated, stats.unchanged), (1, 1, 1))
+        self.assertEqual(Poi.objects.get(external_id="2").name, "B2")
+        self.assertEqual(Poi.objects.get(external_id="1").avg_rating, 3.5)
+
+    def test_duplicate_ids_in_batch_last_wins(self):
+        stats = self.run_csv("1,First,food,,,\n1,Second,food,,,\n", batch_size=10)
+        self.assertEqual(stats.inserted, 1)
+        self.assertEqual(Poi.objects.get(external_id="1").name, "Second")
+
+    def test_stage_timings_recorded(self):
+        stats = self.run_csv("1,A,food,,,\n2,B,food,,,\n3,C,food,,,\n", batch_size=2)
+        self.assertEqual(stats.batches, 2)
+        self.assertEqual(set(stats.timings), {"read", "normalize", "write"})
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        self.run_csv("1,A,food,1.0,2.0,{4}\n2,B,food,,,\n")
+        before = {p.external_id: (p.created_at, p.updated_at, p.content_hash) for p in Poi.objects.all()}
+
+        stats = self.run_csv("1,A,food,1.0,2.0,{4}\n2,B,bar,,,\n")
+        self.assertEqual((stats.inserted, stats.updated, stats.unchanged), (0, 1, 1))
+        after = {p.external_id: (p.created_at, p.updated_at, p.content_hash) for p in Poi.objects.all()}
+        self.assertEqual(after["1"], before["1"])
+        self.assertEqual(after["2"][0], before["2"][0])
+        self.assertGreater(after["2"][1], before["2"][1])
+        self.assertNotEqual(after["2"][2], before["2"][2])
+
+
+class FailingWriter(OrmWriter):
+    def __init__(self, fail_on_call: int):
+        super().__init__()
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def write(self, batch):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            raise RuntimeError("interrupted")
+        return super().write(batch)
+
+
+class ResumableImportTests(TestCase):
+    def import_with_interrupt(self, content: str, suffix: str):
+        path = write_temp(content, suffix)
+        self.addCleanup(os.remove, path)
+
+        status, checkpoint = open_checkpoint(path)
+        self.assertEqual(status, START)
+        with self.assertRaises(RuntimeError):
+            Pipeline.for_path(path, writer=FailingWriter(2), batch_size=2).run(path, False, checkpoint)
+        self.assertEqual(Poi.objects.count(), 2)
+
+        status, checkpoint = open_checkpoint(path)
+        self.assertEqual(status, RESUME)
+        self.assertEqual(checkpoint.records, 2)
+        stats = Pipeline.for_path(path, batch_size=2).run(path, False, checkpoint)
+        self.assertEqual((stats.inserted, stats.unchanged), (3, 0))
+        self.assertEqual(Poi.objects.count(), 5)
+
+        self.assertEqual(open_checkpoint(path), (SKIP, None))
+
+    def test_resume_csv_from_byte_offset(self):
+        self.import_with_interrupt(CSV_HEADER + "".join(f"{i},N{i},c,,,\n" for i in range(5)), ".csv")
+
+    def test_resume_xml_by_skipping_committed_records(self):
+        records = "".join(f"<DATA_RECORD><pid>{i}</pid><pcategory>c</pcategory></DATA_RECORD>" for i in range(5))
+        self.import_with_interrupt(f"<RECORDS>{records}</RECORDS>", ".xml")
+
+    def test_changed_file_starts_over(self):
+        path = write_temp(CSV_HEADER + "1,A,c,,,\n", ".csv")
+        self.addCleanup(os.remove, path)
+        status, checkpoint = open_checkpoint(path)
+        Pipeline.for_path(path).run(path, False, checkpoint)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("2,B,c,,,\n")
+        status, checkpoint = open_checkpoint(path)
+        self.assertEqual((status, checkpoint.records), (START, 0))
+        self.assertEqual(open_checkpoint(path, force=True)[0], START)
+
+    def test_content_hash_is_stored_when_the_import_finishes(self):
+        path = write_temp(CSV_HEADER + "1,A,c,,,\n", ".csv")
+        self.addCleanup(os.remove, path)
+        status, checkpoint = open_checkpoint(path)
+        self.assertEqual(checkpoint.entry.content_hash, "")
+        Pipeline.for_path(path).run(path, False, checkpoint)
+        self.assertEqual(ImportManifest.objects.get().content_hash, file_digest(path))
+
+        # Touched but unchanged: recognised by its hash.
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        self.assertEqual(open_checkpoint(path), (SKIP, None))
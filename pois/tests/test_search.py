@@ -0,0 +1,66 @@
+from django.contrib.admin.sites import site
+from django.db import connection
+from django.test import TestCase
+
+from pois.models import Category, CategoryStats, Poi, PoiGroup
+from pois.stats import refresh_category_stats
+from pois.search import FTS_TABLE, fts_query
+from pois.utils import normalize_batch
+from pois.writers import OrmWriter, RawWriter
+
+
+class FtsQueryTests(TestCase):
+    def test_words_become_quoted_prefixes(self):
+        self.assertEqual(fts_query('café "ber'), '"café"* "ber"*')
+        self.assertIsNone(fts_query(" -- "))
+
+
+class PoiAdminSearchTests(TestCase):
+    def setUp(self):
+        self.admin = site._registry[Poi]
+
+    def search(self, term):
+        qs, _ = self.admin.get_search_results(None, Poi.objects.all(), term)
+        return sorted(qs.values_list("external_id", flat=True))
+
+    def test_import_writers_maintain_the_index(self):
+        for writer in (OrmWriter(), RawWriter()):
+            Poi.objects.all().delete()
+            writer.write(normalize_batch([
+                {"id": "1", "name": "Café Berlin", "category": "food"},
+                {"id": "2", "name": "Bar Hamburg", "category": "bar"},
+            ], "json"))
+            self.assertEqual(self.search("cafe ber"), ["1"])
+            self.assertEqual(self.search("Bar"), ["2"])
+            writer.write(normalize_batch([{"id": "1", "name": "Bistro", "category": "food"}], "json"))
+            self.assertEqual(self.search("cafe"), [])
+            self.assertEqual(self.search("bistro"), ["1"])
+            self.assertEqual(self.search("food"), ["1"])
+
+    def test_exact_id_and_external_id(self):
+        poi = Poi.objects.create(external_id="X-7", name="Kiosk", category=Category.named("shop"))
+        Poi.objects.create(external_id="X-70", name="Other", category=Category.named("shop"))
+        self.assertEqual(self.search("X-7"), ["X-7"])
+        self.assertEqual(self.search(str(poi.pk)), ["X-7"])
+
+    def test_save_and_delete_update_the_index(self):
+        poi = Poi.objects.create(external_id="1", name="Old name", category=Category.named("shop"))
+        poi.name = "New name"
+        poi.save()
+        self.assertEqual(self.search("old"), [])
+        self.assertEqual(self.search("new"), ["1"])
+        Poi.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_renamed_category_is_reindexed(self):
+        RawWriter().write(normalize_batch([{"id": "1", "name": "Kiosk", "category": "shop"}], "json"))
+        refresh_category_stats()
+        category = Category.objects.get(name="shop")
+        category.name = "store"
+        category.save()
+        self.assertEqual(self.search("store"), ["1"])
+        self.assertEqual(self.search("shop"), [])
+        self.assertEqual(list(PoiGroup.objects.values_list("category", flat=True)), ["store"])
+        self.assertEqual(list(CategoryStats.objects.values_list("category", flat=True)), ["store"])
@@ -0,0 +1,104 @@
+import io
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from pois.models import CategoryStats, ImportGeneration, ImportManifest, Poi, PoiGroup
+from pois.search import FTS_TABLE
+from pois.snapshot import SnapshotWriter
+from pois.utils import normalize_batch
+from pois.writers import RawWriter
+
+STORED = [
+    {"id": "1", "name": "A", "category": "food", "ratings": [4]},
+    {"id": "2", "name": "B", "category": "bar", "ratings": [2]},
+    {"id": "3", "name": "C", "category": "bar", "ratings": [3]},
+]
+SNAPSHOT = [
+    {"id": "1", "name": "A", "category": "food", "ratings": [4]},
+    {"id": "2", "name": "B", "category": "pub", "ratings": [2]},
+    {"id": "4", "name": "D", "category": "food", "ratings": [1]},
+    {"id": "4", "name": "D2", "category": "food", "ratings": [5]},
+]
+
+
+class SnapshotWriterTests(TestCase):
+    def setUp(self):
+        RawWriter().write(normalize_batch(STORED, "json"))
+
+    def apply(self, records):
+        writer = SnapshotWriter()
+        stats = writer.write(normalize_batch(records, "json"))
+        self.assertEqual((stats.processed, stats.staged), (0, len(records)))
+        self.assertEqual(Poi.objects.count(), len(STORED))
+        return writer.apply()
+
+    def test_counts_and_rows(self):
+        stats = self.apply(SNAPSHOT)
+        self.assertEqual((stats.inserted, stats.updated, stats.unchanged, stats.deleted), (1, 1, 1, 1))
+        rows = Poi.objects.order_by("external_id").values_list("external_id", "name", "category__name", "avg_rating")
+        self.assertEqual(list(rows), [("1", "A", "food", 4.0), ("2", "B", "pub", 2.0), ("4", "D2", "food", 5.0)])
+
+    def test_groups_and_search_index_follow(self):
+        self.apply(SNAPSHOT)
+        groups = PoiGroup.objects.order_by("name").values_list("name", "category", "poi_count", "rating_sum")
+        self.assertEqual(list(groups), [("A", "food", 1, 4.0), ("B", "pub", 1, 2.0), ("D2", "food", 1, 5.0)])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid, category FROM {FTS_TABLE} ORDER BY rowid")
+            indexed = cursor.fetchall()
+        self.assertEqual(indexed, list(Poi.objects.order_by("id").values_list("id", "category__name")))
+
+    def test_second_apply_is_a_no_op(self):
+        self.apply(SNAPSHOT)
+        updated_at = dict(Poi.objects.values_list("external_id", "updated_at"))
+        writer = SnapshotWriter()
+        writer.write(normalize_batch(SNAPSHOT, "json"))
+        stats = writer.apply()
+        self.assertEqual((stats.inserted, stats.updated, stats.unchanged, stats.deleted), (0, 0, 3, 0))
+        self.assertEqual(dict(Poi.objects.values_list("external_id", "updated_at")), updated_at)
+
+
+class SnapshotCommandTests(TestCase):
+    def setUp(self):
+        RawWriter().write(normalize_batch(STORED, "json"))
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, name, text):
+        path = Path(self.dir.name) / name
+        path.write_text(text)
+        return str(path)
+
+    def test_snapshot_across_files(self):
+        first = self.write("a.csv", "poi_id,poi_name,poi_category,poi_latitude,poi_longitude,poi_ratings\n1,A,food,,,{4}\n")
+        second = self.write("b.ndjson", '{"id": "5", "name": "E", "category": "bar", "ratings": [3]}\n')
+        out, progress = io.StringIO(), io.StringIO()
+        with redirect_stdout(progress):
+            call_command("import_pois", first, second, "--snapshot", stdout=out)
+        self.assertIn("Staged 1 records from", out.getvalue())
+        self.assertIn("Processed 1 records", progress.getvalue())
+        self.assertEqual(sorted(Poi.objects.values_list("external_id", flat=True)), ["1", "5"])
+        self.assertEqual(sorted(CategoryStats.objects.values_list("category", "poi_count")), [("bar", 1), ("food", 1)])
+        self.assertEqual(ImportGeneration.current()[0], 1)
+
+    def test_failed_file_leaves_the_table_alone(self):
+        good = self.write("a.csv", "poi_id,poi_name,poi_category,poi_latitude,poi_longitude,poi_ratings\n1,A,food,,,{4}\n")
+        bad = self.write("b.json", '{"items": [')
+        with self.assertRaisesMessage(CommandError, "1 file(s) failed"):
+            call_command("import_pois", good, bad, "--snapshot", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(Poi.objects.count(), len(STORED))
+
+    def test_deleted_rows_come_back_on_reimport(self):
+        header = "poi_id,poi_name,poi_category,poi_latitude,poi_longitude,poi_ratings\n"
+        full = self.write("full.csv", header + "1,A,food,,,{4}\n2,B,bar,,,{2}\n")
+        call_command("import_pois", full, stdout=io.StringIO())
+        self.assertTrue(ImportManifest.objects.get().completed)
+        call_command("import_pois", self.write("part.csv", header + "1,A,food,,,{4}\n"), "--snapshot", stdout=io.StringIO())
+        self.assertFalse(Poi.objects.filter(external_id="2").exists())
+        self.assertFalse(ImportManifest.objects.exists())
+        call_command("import_pois", full, stdout=io.StringIO())
+        self.assertTrue(Poi.objects.filter(external_id="2").exists())
@@ -0,0 +1,84 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import sys
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+
+from pois import sources
+from pois.manifest import RESUME, open_checkpoint
+from pois.models import Poi
+from pois.parsers.csv_parser import iter_csv_range
+from pois.pipeline import Pipeline, get_format
+from pois.sources import data_suffix, detect_compression, open_source
+from pois.tests.test_pipeline import CSV_HEADER, FailingWriter
+
+CSV = CSV_HEADER + "".join(f"{i},N{i},c,1.5,2.5,\"{{3,4}}\"\n" for i in range(5))
+
+
+def write_bytes(content: bytes, suffix: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+class DetectionTests(SimpleTestCase):
+    def test_stacked_suffixes(self):
+        self.assertEqual(data_suffix("feed.csv.gz"), ".csv")
+        self.assertEqual(data_suffix("feed.v2.XML.xz"), ".xml")
+        self.assertEqual(get_format("feed.jsonl.bz2").file_type, "json")
+        self.assertEqual(detect_compression("feed.json.bz2", b""), "bz2")
+
+    def test_magic_bytes(self):
+        self.assertEqual(detect_compression("feed.csv", gzip.compress(b"x")[:6]), "gzip")
+        self.assertEqual(detect_compression("feed", lzma.compress(b"x")[:6]), "xz")
+        self.assertIsNone(detect_compression("feed.csv", b"poi_id"))
+
+
+class CompressedImportTests(TestCase):
+    def import_bytes(self, content: bytes, suffix: str):
+        path = write_bytes(content, suffix)
+        self.addCleanup(os.remove, path)
+        return Pipeline.for_path(path).run(path, show_progress=False)
+
+    def test_every_compression(self):
+        for compress, suffix in [(gzip.compress, ".csv.gz"), (bz2.compress, ".csv.bz2"), (lzma.compress, ".csv.xz")]:
+            Poi.objects.all().delete()
+            self.assertEqual(self.import_bytes(compress(CSV.encode()), suffix).inserted, 5, suffix)
+            self.assertEqual(Poi.objects.get(external_id="3").avg_rating, 3.5)
+
+    def test_compressed_file_with_plain_suffix(self):
+        self.assertEqual(self.import_bytes(gzip.compress(CSV.encode()), ".csv").inserted, 5)
+
+    def test_stdin(self):
+        stdin = io.TextIOWrapper(io.BytesIO(gzip.compress(b'{"id": "s1", "category": "c"}\n')))
+        with mock.patch.object(sys, "stdin", stdin):
+            stats = Pipeline.for_path("x.ndjson").run("-", show_progress=False)
+        self.assertEqual(stats.inserted, 1)
+
+    def test_resume_compressed_file_by_record_count(self):
+        path = write_bytes(gzip.compress(CSV.encode()), ".csv.gz")
+        self.addCleanup(os.remove, path)
+        _, checkpoint = open_checkpoint(path)
+        with self.assertRaises(RuntimeError):
+            Pipeline.for_path(path, writer=FailingWriter(2), batch_size=2).run(path, False, checkpoint)
+        status, checkpoint = open_checkpoint(path)
+        self.assertEqual(status, RESUME)
+        stats = Pipeline.for_path(path, batch_size=2).run(path, False, checkpoint)
+        self.assertEqual((stats.inserted, stats.unchanged), (3, 0))
+
+
+class MappedFileTests(SimpleTestCase):
+    def test_large_files_are_memory_mapped(self):
+        path = write_bytes(CSV.encode(), ".csv")
+        self.addCleanup(os.remove, path)
+        with mock.patch.object(sources, "MMAP_MIN_BYTES", 0), open_source(path) as source:
+            self.assertIsInstance(source.file, sources.MappedFile)
+            self.assertEqual(list(source.file)[1], b"0,N0,c,1.5,2.5,\"{3,4}\"\n")
+            rows = list(iter_csv_range(source.file, 0, source.size // 2))
+            rows += list(iter_csv_range(source.file, source.size // 2, source.size))
+        self.assertEqual([row["poi_id"] for row in rows], ["0", "1", "2", "3", "4"])
@@ -0,0 +1,57 @@
+from django.test import TestCase
+
+from pois.models import Category, Poi
+from pois.spatial import GRID_COLUMNS, grid_cell, grid_ranges
+
+
+class GridTests(TestCase):
+    def test_grid_cell(self):
+        self.assertEqual(grid_cell(-90, -180), 0)
+        self.assertEqual(grid_cell(-90, 180), GRID_COLUMNS - 1)
+        self.assertIsNone(grid_cell(None, 10))
+        self.assertIsNone(grid_cell(91, 10))
+
+    def test_ranges_cover_every_cell_in_the_box(self):
+        ranges = grid_ranges(10.02, 20.0, 10.28, 20.2)
+        self.assertEqual(len(ranges), 6)  # one per row of cells
+        for lat, lon in [(10.02, 20.0), (10.28, 20.19), (10.15, 20.1)]:
+            cell = grid_cell(lat, lon)
+            self.assertTrue(any(lo <= cell <= hi for lo, hi in ranges))
+
+    def test_antimeridian_ranges_merge_across_rows(self):
+        # The east end of one row touches the west end of the next.
+        ranges = grid_ranges(0.0, 179.9, 0.1, -179.9)
+        self.assertEqual(len(ranges), 3)
+
+
+class PoiQuerySetTests(TestCase):
+    def setUp(self):
+        points = {
+            "berlin": (52.52, 13.405),
+            "potsdam": (52.39, 13.065),
+            "hamburg": (53.55, 9.993),
+            "fiji-east": (-17.0, 179.95),
+            "fiji-west": (-17.0, -179.95),
+            "nowhere": (None, None),
+        }
+        for ext_id, (lat, lon) in points.items():
+            Poi.objects.create(external_id=ext_id, category=Category.named("city"), latitude=lat, longitude=lon)
+
+    def ids(self, qs):
+        return sorted(qs.values_list("external_id", flat=True))
+
+    def test_bbox(self):
+        self.assertEqual(self.ids(Poi.objects.within_bbox(52, 13, 53, 14)), ["berlin", "potsdam"])
+        self.assertEqual(self.ids(Poi.objects.within_bbox(-18, 179, -16, -179)), ["fiji-east", "fiji-west"])
+
+    def test_radius(self):
+        within = Poi.objects.within_radius(52.52, 13.405, 30)
+        self.assertEqual(self.ids(within), ["berlin", "potsdam"])
+        potsdam = within.get(external_id="potsdam")
+        self.assertAlmostEqual(potsdam.distance_km, 27.2, delta=1)
+        self.assertEqual(self.ids(Poi.objects.within_radius(-17.0, 179.99, 10)), ["fiji-east", "fiji-west"])
+
+    def test_nearest(self):
+        found = Poi.objects.nearest(52.5, 13.4, k=3)
+        self.assertEqual([p.external_id for p in found], ["berlin", "potsdam", "hamburg"])
+        self.assertEqual(len(Poi.objects.nearest(0, 0, k=10)), 5)
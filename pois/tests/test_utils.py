@@ -1,7 +1,8 @@
 from decimal import Decimal
+from unittest import mock
 from django.test import SimpleTestCase
 
-from pois.utils import parse_ratings
+from pois.utils import batch_average_ratings, fast_average_rating, normalize_batch, parse_ratings
 
 
 def D(x: str) -> Decimal:
@@ -79,3 +80,66 @@ class ParseRatingsTests(SimpleTestCase):
             parse_ratings("NaN, Infinity, -Infinity, 5"),
             [D("5")],
         )  # keep finite numerics only
+
+
+class NormalizeBatchTests(SimpleTestCase):
+    RECORDS = {
+        "csv": [
+            {"poi_id": " 1 ", "poi_name": " A ", "poi_category": "food", "poi_latitude": "1.5",
+             "poi_longitude": "-2", "poi_ratings": "{3,4,x,5}"},
+            {"poi_id": "", "poi_name": "no id"},
+            {"poi_id": "2", "poi_name": None, "poi_category": None, "poi_latitude": "", "poi_ratings": "{ }"},
+        ],
+        "json": [
+            {"id": 1, "name": "A", "category": "food", "coordinates": {"latitude": 1.5, "longitude": -2},
+             "ratings": [3, "4", 5]},
+            {"name": "no id"},
+            {"id": "2", "coordinates": [1, 2], "ratings": None},
+        ],
+        "xml": [
+            {"pid": "1", "pname": "A", "pcategory": "food", "platitude": "1.5", "plongitude": "-2",
+             "pratings": "3,4,5"},
+            {"pid": None},
+            {"pid": "2", "pname": "", "pcategory": "", "platitude": "", "plongitude": "", "pratings": "NaN"},
+        ],
+    }
+
+    # The same two PoIs in every format; the record without an id is rejected.
+    EXPECTED = [("1", "A", "food", 1.5, -2.0, 4), ("2", "", "", None, None, None)]
+
+    def assert_normalizes(self, exact: bool):
+        for file_type, records in self.RECORDS.items():
+            batch = normalize_batch(records, file_type, exact=exact)
+            self.assertEqual(batch.rejected, 1, file_type)
+            self.assertEqual(list(batch.rows()), self.EXPECTED, file_type)
+            self.assertIsInstance(batch.avg_ratings[0], Decimal if exact else float)
+
+    def test_fast_path(self):
+        self.assert_normalizes(exact=False)
+
+    def test_fast_path_without_numpy(self):
+        with mock.patch("pois.utils.np", None):
+            self.assert_normalizes(exact=False)
+
+    def test_exact_mode_keeps_decimals(self):
+        self.assert_normalizes(exact=True)
+        batch = normalize_batch([{"pid": "1", "pratings": "1,2,2"}], "xml", exact=True)
+        self.assertEqual(batch.avg_ratings, [D("1.67")])
+
+    def test_unsupported_file_type(self):
+        with self.assertRaises(ValueError):
+            normalize_batch([], "yaml")
+
+    def test_batch_averages_skip_invalid_tokens(self):
+        self.assertEqual(
+            batch_average_ratings(["{1,2}", "", None, "x", [4, "5", "inf"], 7]),
+            [1.5, None, None, None, 4.5, 7.0],
+        )
+
+    def test_batch_averages_round_like_fast_path(self):
+        raws = ["{2.675}", "{4.555}", "{1.005}", "{2.665,2.685}"]
+        expected = [fast_average_rating(raw) for raw in raws]
+        self.assertEqual(expected[:2], [2.67, 4.55])
+        self.assertEqual(batch_average_ratings(raws), expected)
+        with mock.patch("pois.utils.np", None):
+            self.assertEqual(batch_average_ratings(raws), expected)
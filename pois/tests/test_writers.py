@@ -0,0 +1,122 @@
+from django.test import TestCase
+
+from pois.categories import CategoryCache
+from pois.models import Category, Poi, PoiGroup
+from pois.utils import normalize_batch
+from pois.writers import OrmWriter, RawWriter
+
+FIRST = [
+    {"id": "1", "name": "A", "category": "food", "coordinates": {"latitude": 1.25, "longitude": -2.5}, "ratings": "{3,4}"},
+    {"id": "2", "name": "B", "category": "bar", "ratings": [1, 2, 2]},
+    {"id": "2", "name": "B again", "category": "bar", "ratings": None},
+    {"id": "3", "name": "", "category": "", "coordinates": None},
+]
+SECOND = [
+    {"id": "1", "name": "A", "category": "food", "coordinates": {"latitude": 1.25, "longitude": -2.5}, "ratings": "{3,4}"},
+    {"id": "2", "name": "B", "category": "pub", "ratings": [5]},
+    {"id": "4", "name": "D", "category": "food", "ratings": "7"},
+]
+FIELDS = ("external_id", "name", "category__name", "latitude", "longitude", "avg_rating", "content_hash")
+
+
+class RawWriterMatchesOrmTests(TestCase):
+    def run_writer(self, writer_cls):
+        Poi.objects.all().delete()
+        writer = writer_cls()
+        first = writer.write(normalize_batch(FIRST, "json"))
+        created = {p.external_id: (p.created_at, p.updated_at) for p in Poi.objects.all()}
+        second = writer.write(normalize_batch(SECOND, "json"))
+        rows = list(Poi.objects.order_by("external_id").values_list(*FIELDS))
+        stamps = {p.external_id: (p.created_at, p.updated_at) for p in Poi.objects.all()}
+        counts = [(s.inserted, s.updated, s.unchanged) for s in (first, second)]
+        return rows, counts, created, stamps
+
+    def test_same_rows_and_counts(self):
+        orm_rows, orm_counts, _, _ = self.run_writer(OrmWriter)
+        raw_rows, raw_counts, _, _ = self.run_writer(RawWriter)
+        self.assertEqual(raw_rows, orm_rows)
+        self.assertEqual(raw_counts, orm_counts)
+        self.assertEqual(raw_counts, [(3, 0, 0), (1, 1, 1)])
+
+    def test_timestamps(self):
+        for writer_cls in (OrmWriter, RawWriter):
+            _, _, created, stamps = self.run_writer(writer_cls)
+            with self.subTest(writer=writer_cls.__name__):
+                # Unchanged row untouched, updated row keeps created_at but moves updated_at.
+                self.assertEqual(stamps["1"], created["1"])
+                self.assertEqual(stamps["2"][0], created["2"][0])
+                self.assertGreater(stamps["2"][1], created["2"][1])
+                self.assertIsNotNone(stamps["4"][0])
+                self.assertLessEqual(stamps["4"][0], stamps["4"][1])
+
+
+    def test_saves_keep_content_hash_current(self):
+        for writer_cls in (OrmWriter, RawWriter):
+            self.run_writer(writer_cls)
+            poi = Poi.objects.get(external_id="4")
+            poi.avg_rating = 8.0
+            poi.save()
+            # Re-importing the original values must undo the edit, not skip the row...
+            undo = writer_cls().write(normalize_batch([SECOND[2]], "json"))
+            # ...and importing the edited values again is a no-op.
+            poi.refresh_from_db()
+            poi.avg_rating = 8.0
+            poi.save()
+            same = writer_cls().write(normalize_batch([{**SECOND[2], "ratings": "8"}], "json"))
+            with self.subTest(writer=writer_cls.__name__):
+                self.assertEqual((undo.updated, undo.unchanged), (1, 0))
+                self.assertEqual((same.updated, same.unchanged), (0, 1))
+
+
+class PoiGroupTests(TestCase):
+    def groups(self):
+        return {
+            (g.name, g.category): (g.poi_count, g.rating_count, g.avg_rating)
+            for g in PoiGroup.objects.all()
+        }
+
+    def test_groups_follow_inserts_and_updates(self):
+        for writer_cls in (OrmWriter, RawWriter):
+            Poi.objects.all().delete()
+            PoiGroup.objects.all().delete()
+            with self.subTest(writer=writer_cls.__name__):
+                writer = writer_cls()
+                writer.write(normalize_batch([
+                    {"id": "1", "name": "Cafe", "category": "food", "ratings": "{4}"},
+                    {"id": "2", "name": "Cafe", "category": "food", "ratings": "{2}"},
+                    {"id": "3", "name": "Cafe", "category": "food"},
+                    {"id": "4", "name": "Bar", "category": "drinks", "ratings": "{5}"},
+                ], "json"))
+                self.assertEqual(self.groups(), {("Cafe", "food"): (3, 2, 3.0), ("Bar", "drinks"): (1, 1, 5.0)})
+
+                # Re-importing unchanged rows must not double count; moved/changed rows shift totals.
+                writer.write(normalize_batch([
+                    {"id": "1", "name": "Cafe", "category": "food", "ratings": "{4}"},
+                    {"id": "2", "name": "Cafe", "category": "food", "ratings": "{5}"},
+                    {"id": "4", "name": "Pub", "category": "drinks", "ratings": "{3}"},
+                ], "json"))
+                self.assertEqual(self.groups(), {("Cafe", "food"): (3, 2, 4.5), ("Pub", "drinks"): (1, 1, 3.0)})
+
+
+class CategoryCacheTests(TestCase):
+    def test_known_names_need_no_queries(self):
+        cache = CategoryCache()
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = cache.resolve(["food", "bar", "food"])
+        self.assertEqual(ids, dict(Category.objects.values_list("name", "pk")))
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.resolve(["bar", "food"]), ids)
+
+    def test_ids_are_cached_only_after_commit(self):
+        cache = CategoryCache()
+        with self.captureOnCommitCallbacks(execute=False):
+            self.assertIn("shop", cache.resolve(["shop"]))
+        self.assertEqual(cache.ids, {})
+
+    def test_writers_store_category_ids(self):
+        for writer in (OrmWriter(), RawWriter()):
+            Poi.objects.all().delete()
+            with self.subTest(writer=type(writer).__name__):
+                writer.write(normalize_batch(SECOND, "json"))
+                food = Category.objects.get(name="food")
+                self.assertEqual(sorted(food.pois.values_list("external_id", flat=True)), ["1", "4"])
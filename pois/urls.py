@@ -0,0 +1,8 @@
+from django.urls import path
+
+from pois import views
+
+urlpatterns = [
+    path("pois/", views.poi_list, name="poi-list"),
+    path("pois/<path:external_id>/", views.poi_detail, name="poi-detail"),
+]
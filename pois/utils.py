@@ -1,8 +1,15 @@
-from typing import Iterable, List, Dict, Any, Generator, Literal
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Generator, Optional, Tuple
+import hashlib
 from decimal import Decimal
+from math import isfinite
 from statistics import mean
 from typing import Any, List
 
+try:
+    import numpy as np
+except ImportError:  # optional: speeds up batch rating averages when installed
+    np = None
+
 
 def parse_ratings(raw: Any) -> List[Decimal]:
     """
@@ -42,71 +49,168 @@ def average_rating(ratings: List[Decimal]) -> Decimal | None:
     return round(mean(ratings), 2) if ratings else None
 
 
-def normalize_record(record: Dict[str, Any], file_type: str) -> Dict[str, Any]:
+# Source keys per format: external_id, name, category, latitude, longitude, ratings.
+# A (key, subkey) pair reads a nested dict, e.g. JSON's coordinates.latitude.
+FIELD_MAPS: Dict[str, Tuple[Any, ...]] = {
+    "csv": ("poi_id", "poi_name", "poi_category", "poi_latitude", "poi_longitude", "poi_ratings"),
+    "json": ("id", "name", "category", ("coordinates", "latitude"), ("coordinates", "longitude"), "ratings"),
+    "xml": ("pid", "pname", "pcategory", "platitude", "plongitude", "pratings"),
+}
+
+
+def _compile_getter(key: Any) -> Callable[[Dict[str, Any]], Any]:
+    if isinstance(key, tuple):
+        outer, inner = key
+
+        def get_nested(record: Dict[str, Any]) -> Any:
+            value = record.get(outer)
+            return value.get(inner) if isinstance(value, dict) else None
+        return get_nested
+    return lambda record: record.get(key)
+
+
+_GETTERS: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], ...]] = {
+    file_type: tuple(_compile_getter(key) for key in keys) for file_type, keys in FIELD_MAPS.items()
+}
+
+
+class PoiBatch:
     """
-    Normalize a PoI record from CSV/JSON/XML into a unified schema.
-    - Output keys: external_id(str), name(str), category(str), latitude(float|None), longitude(float|None), ratings(List[Decimal])
-    - CSV fields: poi_id, poi_name, poi_latitude, poi_longitude, poi_category, poi_ratings.
-    - JSON fields: id, name, coordinates (json with latitude/longitude or [lat, lon]), category, ratings
-    - XML fields: pid, pname, platitude, plongitude, pcategory, pratings
+    Column-oriented batch of normalized PoIs; row i is the i-th entry of every column.
+    avg_ratings holds floats, or Decimals when normalized in exact mode.
     """
-    # Map source keys for different files to common key-value data and return it.
-    if file_type == "csv":
-        ext_id = record.get("poi_id")
-        name = record.get("poi_name")
-        category = record.get("poi_category")
-        lat = record.get("poi_latitude")
-        lon = record.get("poi_longitude")
-        ratings_raw = record.get("poi_ratings")
-    elif file_type == "json":
-        ext_id = record.get("id")
-        name = record.get("name")
-        category = record.get("category")
-        coords = record.get("coordinates") or {}
-        lat = (coords.get("latitude") if isinstance(coords, dict) else  None)
-        lon = (coords.get("longitude") if isinstance(coords, dict) else  None)
-        ratings_raw = record.get("ratings")
-    elif file_type == "xml":
-        ext_id = record.get("pid")
-        name = record.get("pname")
-        category = record.get("pcategory")
-        lat = record.get("platitude")
-        lon = record.get("plongitude")
-        ratings_raw = record.get("pratings")
-    else:
-        raise ValueError(f"Unsupported file_type: {file_type}")
 
-    ratings = parse_ratings(ratings_raw)
-    avg = average_rating(ratings)
-    # latitude, longitude are not needed on admin site, but keep it for now.
-    return {
-        "external_id": str(ext_id).strip() if ext_id is not None else None,
-        "name": (str(name).strip() if name is not None else None) or "",
-        "category": (str(category).strip() if category is not None else None) or "",
-        "latitude": float(lat) if lat not in (None, "") else None,
-        "longitude": float(lon) if lon not in (None, "") else None,
-        "ratings": ratings,
-        "avg_rating": avg,
-    }
-
-
-def calculate_chunks(total: int) -> int:
+    __slots__ = ("external_ids", "names", "categories", "latitudes", "longitudes", "avg_ratings", "rejected")
+
+    def __init__(self, external_ids=None, names=None, categories=None, latitudes=None, longitudes=None,
+                 avg_ratings=None, rejected: int = 0):
+        self.external_ids: List[str] = external_ids if external_ids is not None else []
+        self.names: List[str] = names if names is not None else []
+        self.categories: List[str] = categories if categories is not None else []
+        self.latitudes: List[Optional[float]] = latitudes if latitudes is not None else []
+        self.longitudes: List[Optional[float]] = longitudes if longitudes is not None else []
+        self.avg_ratings: List[Any] = avg_ratings if avg_ratings is not None else []
+        # Records dropped while normalizing (missing external_id).
+        self.rejected = rejected
+
+    def __len__(self) -> int:
+        return len(self.external_ids)
+
+    def rows(self) -> Iterator[Tuple[Any, ...]]:
+        """(external_id, name, category, latitude, longitude, avg_rating) tuples."""
+        return zip(self.external_ids, self.names, self.categories, self.latitudes, self.longitudes, self.avg_ratings)
+
+
+def _rating_tokens(raw: Any) -> Any:
+    if raw is None:
+        return ()
+    if isinstance(raw, str):
+        s = raw.strip()
+        if s.startswith("{") and s.endswith("}"):
+            s = s[1:-1]
+        return s.split(",") if s.strip() else ()
+    if isinstance(raw, (list, tuple)):
+        return raw
+    return (raw,)
+
+
+def fast_average_rating(raw: Any) -> Optional[float]:
+    """
+    Float equivalent of average_rating(parse_ratings(raw)). Skips the Decimal
+    round trip; results can differ from the exact path in the last rounded digit.
     """
-    This function simply provides number of chunks for batch processing if records are more than 1K.
-    Parameters
-    ----------
-    total : str
-        Total number of records in the file.
+    total = 0.0
+    n = 0
+    for token in _rating_tokens(raw):
+        try:
+            v = float(token)
+        except (TypeError, ValueError):
+            continue
+        if isfinite(v):
+            total += v
+            n += 1
+    return round(total / n, 2) if n else None
+
+
+def _float_or_nan(token: Any) -> float:
+    try:
+        return float(token)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def batch_average_ratings(raws: List[Any]) -> List[Optional[float]]:
+    """Average many raw rating values at once; vectorized with NumPy when it's installed."""
+    if np is None:
+        return [fast_average_rating(raw) for raw in raws]
+
+    tokens: List[Any] = []
+    lengths: List[int] = []
+    for raw in raws:
+        toks = _rating_tokens(raw)
+        tokens.extend(toks)
+        lengths.append(len(toks))
+    if not tokens:
+        return [None] * len(raws)
+    try:
+        values = np.array(tokens, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Blank or non-numeric tokens somewhere in the batch: convert one by one.
+        values = np.fromiter((_float_or_nan(t) for t in tokens), dtype=np.float64, count=len(tokens))
+    idx = np.repeat(np.arange(len(raws)), lengths)
+    valid = np.isfinite(values)
+    sums = np.bincount(idx, weights=np.where(valid, values, 0.0), minlength=len(raws))
+    counts = np.bincount(idx, weights=valid, minlength=len(raws))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avgs = (sums / counts).tolist()
+    # round() rather than np.round(), which scales by 100 first and can round the
+    # other way (2.675 -> 2.68); this keeps both paths in agreement.
+    return [round(a, 2) if c else None for a, c in zip(avgs, counts.tolist())]
+
+
+def normalize_batch(records: Iterable[Dict[str, Any]], file_type: str, exact: bool = False) -> PoiBatch:
     """
-    if total <= 1000:
-        return total
-    if total >= 100_000:
-        parts = 10
+    Normalize a batch of raw records into a PoiBatch (see FIELD_MAPS). Records without an
+    external_id are counted in PoiBatch.rejected instead of being returned.
+    With exact=True ratings go through parse_ratings/average_rating (Decimal).
+    """
+    try:
+        get_id, get_name, get_category, get_lat, get_lon, get_ratings = _GETTERS[file_type]
+    except KeyError:
+        raise ValueError(f"Unsupported file_type: {file_type}")
+
+    out = PoiBatch()
+    ratings_raw: List[Any] = []
+    for rec in records:
+        ext_id = get_id(rec)
+        ext_id = str(ext_id).strip() if ext_id is not None else None
+        if not ext_id:
+            out.rejected += 1
+            continue
+        name = get_name(rec)
+        category = get_category(rec)
+        lat = get_lat(rec)
+        lon = get_lon(rec)
+        out.external_ids.append(ext_id)
+        out.names.append((str(name).strip() if name is not None else None) or "")
+        out.categories.append((str(category).strip() if category is not None else None) or "")
+        out.latitudes.append(float(lat) if lat not in (None, "") else None)
+        out.longitudes.append(float(lon) if lon not in (None, "") else None)
+        ratings_raw.append(get_ratings(rec))
+
+    if exact:
+        out.avg_ratings = [average_rating(parse_ratings(raw)) for raw in ratings_raw]
     else:
-        # 2 parts if records are  greater than 1000 and less than 100k
-        parts = 2
-    size = max(1, (total + parts - 1) // parts)
-    return size
+        out.avg_ratings = batch_average_ratings(ratings_raw)
+    return out
+
+
+def content_hash(name: str, category: str, lat: Optional[float], lon: Optional[float], avg: Any) -> str:
+    """Stable digest of a PoI's imported fields, stored in Poi.content_hash."""
+    avg = float(avg) if avg is not None else None
+    payload = "\x1f".join((name, category, repr(lat), repr(lon), repr(avg)))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
 
 def create_chunks(iterable: Iterable[Any], size: int) -> Generator[List[Any], None, None]:
     buf: List[Any] = []
@@ -118,23 +222,13 @@ def create_chunks(iterable: Iterable[Any], size: int) -> Generator[List[Any], No
     if buf:
         yield buf
 
-def progress_messages(done: int, total: int) -> str:
-    pct = (done / total * 100) if total else 100.0
-    return f"Processed {done}/{total} records ({pct:.1f}%)."
-
-def save_by_name_and_category(data: Dict[str, any], memo: Dict[str, any]) -> None:
-    name = data.get("name")
-    category = data.get("category")
-    current_avg = data['avg_rating']
-    key = name + '--' + category
-    if key not in memo:
-        combined_avg = [current_avg] if isinstance(current_avg, Decimal) else []
-        memo[key] = {**data, "combined_avg": combined_avg }
-    else:
-        combined_avg = [ current_avg, *memo[key]['combined_avg'] ]
-        memo[key] = {**data, "combined_avg": combined_avg }
-
-
-
-
+# Streaming loaders don't know the record count up front, so they work in fixed
+# batches and report progress from how far into the file they've read.
+STREAM_BATCH_SIZE = 5000
 
+def stream_progress_messages(done: int, read_bytes: int, total_bytes: int) -> str:
+    if not total_bytes:
+        # Unknown size, e.g. reading stdin.
+        return f"Processed {done} records."
+    pct = (read_bytes / total_bytes * 100) if total_bytes else 100.0
+    return f"Processed {done} records ({pct:.1f}% of file)."
@@ -0,0 +1,146 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from pois.models import ImportGeneration, Poi
+
+# Response keys, and the Poi values they are read from.
+API_KEYS = ("id", "external_id", "name", "category", "latitude", "longitude", "avg_rating")
+API_FIELDS = ("id", "external_id", "name", "category__name", "latitude", "longitude", "avg_rating")
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class ResponseCache:
+    """
+    Serialized API responses keyed by URL, valid for one import generation: the first
+    lookup under a newer generation drops everything. Least recently used entries are
+    evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.generation = None
+        self.entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, generation: int, key: str) -> Optional[bytes]:
+        with self.lock:
+            if generation != self.generation:
+                self.entries.clear()
+                self.generation = generation
+                return None
+            content = self.entries.get(key)
+            if content is not None:
+                self.entries.move_to_end(key)
+            return content
+
+    def set(self, generation: int, key: str, content: bytes) -> None:
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = content
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
+
+
+def _generation(request):
+    # Read once per request; both conditional-GET callbacks and the cache need it.
+    if not hasattr(request, "_poi_generation"):
+        request._poi_generation = ImportGeneration.current()
+    return request._poi_generation
+
+
+def _etag(request, *args, **kwargs) -> str:
+    return f"gen-{_generation(request)[0]}"
+
+
+def _last_modified(request, *args, **kwargs):
+    return _generation(request)[1]
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _number(request, name: str, cast=float, default=None):
+    value = request.GET.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        raise BadRequest(f"{name} must be a number.")
+
+
+def cached(view):
+    """Serve a view's JSON from response_cache until the import generation changes."""
+
+    def wrapper(request, *args, **kwargs):
+        generation = _generation(request)[0]
+        key = request.get_full_path()
+        content = response_cache.get(generation, key)
+        if content is None:
+            try:
+                data = view(request, *args, **kwargs)
+            except BadRequest as exc:
+                return JsonResponse({"error": str(exc)}, status=400)
+            if data is None:
+                return JsonResponse({"error": "Not found."}, status=404)
+            content = json.dumps(data).encode()
+            response_cache.set(generation, key, content)
+        return HttpResponse(content, content_type="application/json")
+
+    return wrapper
+
+
+@require_safe
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+@cached
+def poi_list(request):
+    """
+    GET /api/pois/?category=&min_rating=&max_rating=&after=&limit=
+    PoIs in id order, `limit` at a time; `next` links to the page after the last id.
+    """
+    limit = _number(request, "limit", int, DEFAULT_LIMIT)
+    if not 1 <= limit <= MAX_LIMIT:
+        raise BadRequest(f"limit must be between 1 and {MAX_LIMIT}.")
+    after = _number(request, "after", int)
+    min_rating = _number(request, "min_rating")
+    max_rating = _number(request, "max_rating")
+
+    pois = Poi.objects.order_by("id")
+    if request.GET.get("category"):
+        pois = pois.filter(category__name=request.GET["category"])
+    if min_rating is not None:
+        pois = pois.filter(avg_rating__gte=min_rating)
+    if max_rating is not None:
+        pois = pois.filter(avg_rating__lte=max_rating)
+    if after is not None:
+        pois = pois.filter(id__gt=after)
+
+    # One extra row tells whether there is a next page.
+    results = [dict(zip(API_KEYS, row)) for row in pois.values_list(*API_FIELDS)[:limit + 1]]
+    next_url = None
+    if len(results) > limit:
+        results = results[:limit]
+        params = request.GET.copy()
+        params["after"] = results[-1]["id"]
+        next_url = f"{request.path}?{params.urlencode()}"
+    return {"results": results, "next": next_url}
+
+
+@require_safe
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+@cached
+def poi_detail(request, external_id: str):
+    """GET /api/pois/<external_id>/"""
+    row = Poi.objects.filter(external_id=external_id).values_list(*API_FIELDS).first()
+    return dict(zip(API_KEYS, row)) if row is not None else None
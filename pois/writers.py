@@ -0,0 +1,184 @@
+from typing import Any, Dict, List, Optional, Tuple
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from pois.categories import CategoryCache
+from pois.models import Poi, PoiGroup
+from pois import search
+from pois.pipeline import ImportStats
+from pois.spatial import grid_cell
+from pois.utils import PoiBatch, content_hash
+
+# Fields that are allowed to change on updates (category_id: see pois.categories)
+UPDATABLE_FIELDS = ["name", "category_id", "latitude", "longitude", "avg_rating"]
+# Order of the values in the row tuples produced by plan_upsert().
+ROW_FIELDS = [*UPDATABLE_FIELDS, "grid_cell", "content_hash"]
+
+
+# (name, category) -> [poi_count, rating_sum, rating_count] deltas for PoiGroup
+GroupDeltas = Dict[Tuple[str, str], List[Any]]
+
+
+def _add_to_group(deltas: GroupDeltas, name: str, category: str, avg: Optional[float], sign: int) -> None:
+    delta = deltas.get((name, category))
+    if delta is None:
+        delta = deltas[(name, category)] = [0, 0.0, 0]
+    delta[0] += sign
+    if avg is not None:
+        delta[1] += sign * avg
+        delta[2] += sign
+
+
+def plan_upsert(
+    batch: PoiBatch, categories: Optional[CategoryCache] = None,
+) -> Tuple[Dict[str, tuple], ImportStats, GroupDeltas]:
+    """
+    Dedupe a batch (later rows win), hash each row, and drop rows whose stored
+    content_hash already matches. Returns ({external_id: row tuple in ROW_FIELDS
+    order} to write, stats with inserted/updated/unchanged filled in, and the
+    PoiGroup deltas the write implies). Category names are resolved to ids
+    through `categories`.
+    """
+    stats = ImportStats()
+    category_ids = (categories or CategoryCache()).resolve(batch.categories)
+    incoming: Dict[str, tuple] = {}
+    for ext_id, name, category, lat, lon, avg in batch.rows():
+        avg = float(avg) if avg is not None else None
+        incoming[ext_id] = (
+            name, category_ids[category], lat, lon, avg, grid_cell(lat, lon), content_hash(name, category, lat, lon, avg),
+        )
+
+    deltas: GroupDeltas = {}
+    existing = Poi.objects.filter(external_id__in=list(incoming)).values_list(
+        "external_id", "content_hash", "name", "category__name", "avg_rating",
+    )
+    for ext_id, stored_hash, name, category, avg in existing:
+        if incoming[ext_id][-1] == stored_hash:
+            del incoming[ext_id]
+            stats.unchanged += 1
+        else:
+            # The old values leave their group; the new ones are added below.
+            _add_to_group(deltas, name, category, avg, -1)
+            stats.updated += 1
+    stats.inserted = len(incoming) - stats.updated
+    category_names = {pk: name for name, pk in category_ids.items()}
+    for name, category_id, _, _, avg, *_ in incoming.values():
+        _add_to_group(deltas, name, category_names[category_id], avg, 1)
+    return incoming, stats, deltas
+
+
+def group_deltas(queryset, sign: int, deltas: Optional[GroupDeltas] = None) -> GroupDeltas:
+    """
+    Deltas for adding (sign=1) or removing (sign=-1) the PoIs of a queryset, from one
+    GROUP BY; for writes that don't go through plan_upsert(), e.g. in the admin.
+    """
+    deltas = {} if deltas is None else deltas
+    totals = queryset.values_list("name", "category__name").annotate(
+        Count("pk"), Sum("avg_rating"), Count("avg_rating"),
+    ).order_by()
+    for name, category, count, rating_sum, rating_count in totals:
+        delta = deltas.get((name, category))
+        if delta is None:
+            delta = deltas[(name, category)] = [0, 0.0, 0]
+        delta[0] += sign * count
+        delta[1] += sign * (rating_sum or 0.0)
+        delta[2] += sign * rating_count
+    return deltas
+
+
+def apply_group_deltas(deltas: GroupDeltas) -> None:
+    """Fold a batch's deltas into PoiGroup with one upsert, dropping groups left empty."""
+    deltas = {key: d for key, d in deltas.items() if any(d)}
+    if not deltas:
+        return
+    qn = connection.ops.quote_name
+    table = qn(PoiGroup._meta.db_table)
+    totals = ("poi_count", "rating_sum", "rating_count")
+    sql = (
+        f"INSERT INTO {table} ({qn('name')}, {qn('category')}, {', '.join(qn(c) for c in totals)}) "
+        f"VALUES (%s, %s, %s, %s, %s) "
+        f"ON CONFLICT ({qn('name')}, {qn('category')}) DO UPDATE SET "
+        + ", ".join(f"{qn(c)} = {table}.{qn(c)} + excluded.{qn(c)}" for c in totals)
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(name, category, *d) for (name, category), d in deltas.items()])
+        shrunk = [key for key, d in deltas.items() if d[0] < 0]
+        if shrunk:
+            cursor.executemany(
+                f"DELETE FROM {table} WHERE {qn('name')} = %s AND {qn('category')} = %s AND {qn('poi_count')} <= 0",
+                shrunk,
+            )
+
+
+def reindex_search(incoming: Dict[str, tuple]) -> None:
+    """Refresh the full-text index for the rows just written (no-op without one)."""
+    with connection.cursor() as cursor:
+        search.reindex(cursor, "external_id", list(incoming))
+
+
+class OrmWriter:
+    """
+    Upserts normalized rows with a single INSERT ... ON CONFLICT(external_id)
+    DO UPDATE per batch. Rows whose content_hash is unchanged are not written.
+    """
+
+    def __init__(self):
+        self.fts = search.has_fts()
+        self.categories = CategoryCache()
+
+    def write(self, batch: PoiBatch) -> ImportStats:
+        with transaction.atomic():
+            incoming, stats, deltas = plan_upsert(batch, self.categories)
+            if incoming:
+                Poi.objects.bulk_create(
+                    [Poi(external_id=ext_id, **dict(zip(ROW_FIELDS, row))) for ext_id, row in incoming.items()],
+                    update_conflicts=True,
+                    unique_fields=["external_id"],
+                    # created_at is left alone on conflict; auto_now refreshes updated_at.
+                    update_fields=[*ROW_FIELDS, "updated_at"],
+                )
+                if self.fts:
+                    reindex_search(incoming)
+            apply_group_deltas(deltas)
+        return stats
+
+
+def _upsert_sql() -> str:
+    qn = connection.ops.quote_name
+    columns = ["external_id", *ROW_FIELDS, "created_at", "updated_at"]
+    updates = [*ROW_FIELDS, "updated_at"]
+    return (
+        f"INSERT INTO {qn(Poi._meta.db_table)} ({', '.join(qn(c) for c in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({qn('external_id')}) DO UPDATE SET "
+        + ", ".join(f"{qn(c)} = excluded.{qn(c)}" for c in updates)
+    )
+
+
+class RawWriter:
+    """
+    Same upsert as OrmWriter, but rows go straight from the PoiBatch columns to
+    cursor.executemany() without building model instances. created_at/updated_at
+    are filled in here, matching the ORM's auto_now_add/auto_now behaviour.
+    """
+
+    def __init__(self):
+        self.sql = _upsert_sql()
+        self.fts = search.has_fts()
+        self.categories = CategoryCache()
+
+    def write(self, batch: PoiBatch) -> ImportStats:
+        with transaction.atomic():
+            incoming, stats, deltas = plan_upsert(batch, self.categories)
+            if incoming:
+                now = connection.ops.adapt_datetimefield_value(timezone.now())
+                with connection.cursor() as cursor:
+                    cursor.executemany(self.sql, [(ext_id, *row, now, now) for ext_id, row in incoming.items()])
+                if self.fts:
+                    reindex_search(incoming)
+            apply_group_deltas(deltas)
+        return stats
+
+
+WRITERS = {"orm": OrmWriter, "raw": RawWriter}